@@ -88,4 +88,20 @@ INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE col12 I
 -- Completed DML chunking."""
         , stderr=''
         , map_out=map_out)
-]
\ No newline at end of file
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_date_part.py @{argsdir}/yb_chunk_dml_by_date_part__args1 '
+            '--execute_chunk_dml --target_chunk_seconds 3600 --parallel_sessions 1 '
+            '--state_file {argsdir}/yb_chunk_dml_by_date_part__target.state.json '
+            """--pre_sql 'DROP TABLE IF EXISTS dev.chunk_dml_target_t; CREATE TABLE dev.chunk_dml_target_t AS SELECT * FROM {db1}.dev.data_types_t WHERE FALSE;' """
+            """--dml 'INSERT INTO dev.chunk_dml_target_t SELECT * FROM {db1}.dev.data_types_t WHERE <chunk_where_clause>' """
+            """--post_sql 'DROP TABLE dev.chunk_dml_target_t;' """
+            """| grep -E '^-- chunk|chunks completed'""")
+        , exit_code=0
+        , stdout="""-- chunk 1 of 9: 327156 rows in DURATION
+-- chunks 2-8 of 9: 672844 rows in DURATION
+-- chunk 9 of 9: 0 rows in DURATION
+-- 9 of 9 chunks completed, 0 failed, 0 not run, 1000000 rows in DURATION"""
+        , stderr=''
+        , map_out=[ { 'regex' : re.compile(r' rows in [\d:.]+'), 'sub' : ' rows in DURATION' } ])
+]
@@ -132,4 +132,52 @@ INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE col4 IS
 """
         , stderr=''
         , map_out=map_out)
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col1 --column_cardinality high --parallel_sessions 4')
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_chunk_dml_by_integer.py [options]
+yb_chunk_dml_by_integer.py: error: the --parallel_sessions option requires --execute_chunk_dml""")
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col1 --column_cardinality high --execute_chunk_dml --parallel_sessions 2 '
+            '--state_file {argsdir}/yb_chunk_dml_by_integer__parallel.state.json '
+            """--pre_sql 'DROP TABLE IF EXISTS dev.chunk_dml_parallel_t; CREATE TABLE dev.chunk_dml_parallel_t AS SELECT * FROM {db1}.dev.data_types_t WHERE FALSE;' """
+            """--dml 'INSERT INTO dev.chunk_dml_parallel_t SELECT * FROM {db1}.dev.data_types_t WHERE <chunk_where_clause>' """
+            """--post_sql 'SELECT COUNT(*) FROM dev.chunk_dml_parallel_t; DROP TABLE dev.chunk_dml_parallel_t;' """
+            """| grep -E 'chunks completed|^[0-9]+$'""")
+        , exit_code=0
+        , stdout="""-- N of N chunks completed, 0 failed, 0 not run, 1000000 rows in DURATION
+1000000"""
+        , stderr=''
+        , map_out=[
+            { 'regex' : re.compile(r'-- (\d+) of \1 chunks completed'), 'sub' : '-- N of N chunks completed' }
+            , { 'regex' : re.compile(r' rows in [\d:.]+'), 'sub' : ' rows in DURATION' } ])
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col1 --column_cardinality high --plan_sample_pct 100 '
+            '--save_chunk_plan {argsdir}/yb_chunk_dml_by_integer__sample.plan.json > /dev/null'
+            """; grep -o '"sizes": "[^"]*"' {argsdir}/yb_chunk_dml_by_integer__sample.plan.json""")
+        , exit_code=0
+        , stdout='''"sizes": "estimated from a 100.0% sample"'''
+        , stderr='')
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col1 --column_cardinality high --execute_chunk_dml '
+            '--state_file {argsdir}/yb_chunk_dml_by_integer__running.state.json '
+            """--pre_sql 'DROP TABLE IF EXISTS dev.chunk_dml_running_t; CREATE TABLE dev.chunk_dml_running_t AS SELECT * FROM {db1}.dev.data_types_t WHERE FALSE;' """
+            """--dml 'INSERT INTO dev.chunk_dml_running_t SELECT * FROM {db1}.dev.data_types_t WHERE <chunk_where_clause>' """
+            """--post_sql 'DROP TABLE dev.chunk_dml_running_t;' > /dev/null"""
+            """; sed -i '0,/"status": "done"/s//"status": "running"/' {argsdir}/yb_chunk_dml_by_integer__running.state.json"""
+            '; {argsdir}/../../yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col1 --column_cardinality high --execute_chunk_dml '
+            '--resume {argsdir}/yb_chunk_dml_by_integer__running.state.json '
+            """--dml 'INSERT INTO dev.chunk_dml_running_t SELECT * FROM {db1}.dev.data_types_t WHERE <chunk_where_clause>'""")
+        , exit_code=(0 if Common.is_windows else 1)
+        , stdout=''
+        , stderr="""yb_chunk_dml_by_integer.py: chunk/s 1 were running when the previous run ended and may have committed, check the table then set their status to done in the state file or run them again with --rerun_running...""")
 ]
@@ -96,4 +96,12 @@ INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE col19 I
 -- Completed DML chunking."""
         , stderr=''
         , map_out=map_out)
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer_yyyymmdd.py @{argsdir}/yb_chunk_dml_by_integer_yyyymmdd__args1 '
+            '--resume yb_chunk_dml_by_integer_yyyymmdd.state.json')
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_chunk_dml_by_integer_yyyymmdd.py [options]
+yb_chunk_dml_by_integer_yyyymmdd.py: error: the --resume option requires --execute_chunk_dml""")
 ]
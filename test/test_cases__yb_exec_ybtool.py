@@ -12,4 +12,29 @@ test_cases = [
         , exit_code=0
         , stdout="""True"""
         , stderr='')
-]
\ No newline at end of file
+    , test_case(
+        cmd="""yb_exec_ybtool.py  @{argsdir}/db1 --ybtool_cmd "ybsql -A -t -c 'SELECT CURRENT_USER, CURRENT_DATABASE()'" """
+        , exit_code=0
+        , stdout="""{user_name}|{db1}"""
+        , stderr='')
+    , test_case(
+        cmd=("""yb_exec_ybtool.py  @{argsdir}/db1 --ybtool_cmd "python3 -c '"""
+            """import sys; sys.path.insert(0, \\"..\\"); from yb_common import DBConnect"""
+            """; db_conn = DBConnect(env=DBConnect.create_env())"""
+            """; print([(result[\\"rowcount\\"], result[\\"error\\"] is None) for result in db_conn.ybsql_batch("""
+            """[\\"SELECT 1 AS a\\", \\"SELECT 1 AS a UNION ALL SELECT 2\\", \\"SELECT 1/0\\", \\"SELECT 3 AS c\\"])])'" """)
+        , exit_code=0
+        , stdout="""[(1, True), (2, True), (None, False), (1, True)]"""
+        , stderr='')
+    , test_case(
+        cmd=("""yb_exec_ybtool.py  @{argsdir}/db1 --ybtool_cmd "python3 -c '"""
+            """import sys; sys.path.insert(0, \\"..\\"); from yb_common import DBConnect"""
+            """; db_conn = DBConnect(env=DBConnect.create_env()); db_conn.use_ybsql_session = True"""
+            """; schema = lambda sql: db_conn.ybsql_query(sql).stdout.strip()"""
+            """; before = schema(\\"SELECT CURRENT_SCHEMA\\")"""
+            """; changed = schema(\\"SET SCHEMA \\x27dev\\x27; SELECT CURRENT_SCHEMA\\")"""
+            """; print([changed == \\"dev\\", schema(\\"SELECT CURRENT_SCHEMA\\") == before, db_conn.ybsql_session is not None])'" """)
+        , exit_code=0
+        , stdout="""[True, True, True]"""
+        , stderr='')
+]
@@ -35,4 +35,12 @@ test_cases = [
         , stdout=""
         , stderr="""yb_get_table_name.py: error: unrecognized arguments: extra_pos_arg
 for complete help, execute: yb_get_table_name.py --help""")
-]
\ No newline at end of file
+
+    , test_case(
+        cmd=('yb_get_table_name.py @{argsdir}/db1 --schema dev --table a1_t --profile 2>&1'
+            """ | grep -E '^(a1_t$|Total )' | cut -d' ' -f1""")
+        , exit_code=0
+        , stdout="""a1_t
+Total"""
+        , stderr='')
+]
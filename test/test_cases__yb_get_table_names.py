@@ -12,6 +12,22 @@ test_cases = [
 {db2}.dev.c1_t
 {db2}.dev.data_types_t
 {db2}.dev.dist_random_t
+{db2}.dev.dist_replicate_t"""
+        , stderr='')
+
+    , test_case(cmd='yb_get_table_names.py @{argsdir}/db1 --schema_in dev --ybsql_session --no_catalog_cache'
+        , exit_code=0
+        , stdout="""{db1}.dev.a1_t
+{db1}.dev.b1_t
+{db1}.dev.c1_t
+{db1}.dev.data_types_t
+{db1}.dev.dist_random_t
+{db1}.dev.dist_replicate_t
+{db2}.dev.a1_t
+{db2}.dev.b1_t
+{db2}.dev.c1_t
+{db2}.dev.data_types_t
+{db2}.dev.dist_random_t
 {db2}.dev.dist_replicate_t"""
         , stderr='')
 
@@ -133,4 +149,26 @@ test_cases = [
 {db1}."Prod"."C1_t" rows: 0
 {db1}."Prod".data_types_t rows: 0"""
         , stderr='')
+    , test_case(
+        cmd=(
+            'yb_get_table_names.py @{argsdir}/db1 --schema_in dev --catalog_cache_shared > /dev/null'
+            '; {argsdir}/../../yb_get_table_names.py @{argsdir}/db1 --schema_in dev --catalog_cache_shared --verbose 2'
+            ' | grep -c "Using cached catalog query result"'
+            '; {argsdir}/../../yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1'
+            ' --column col4 --execute_chunk_dml --column_cardinality low --catalog_cache_shared > /dev/null'
+            '; {argsdir}/../../yb_get_table_names.py @{argsdir}/db1 --schema_in dev --catalog_cache_shared --verbose 2'
+            ' | grep -c "Using cached catalog query result" || true')
+        , exit_code=0
+        , stdout="""1
+0"""
+        , stderr='')
+
+    , test_case(
+        cmd=(
+            'yb_get_table_names.py @{argsdir}/db1 --schema_in dev > /dev/null'
+            '; {argsdir}/../../yb_get_table_names.py @{argsdir}/db1 --schema_in dev --verbose 2'
+            ' | grep -c "Using cached catalog query result" || true')
+        , exit_code=0
+        , stdout="""0"""
+        , stderr='')
 ]
\ No newline at end of file
@@ -17,6 +17,24 @@ name                                           per          rows
 name                                           per          rows                 rows     rows
                                                              per
 -----------------------------  -----------  ------  ----  ------  -----------  ------  -------
+{db1}.dev.data_types_t.col1  10^0              1  to         9      1000000       1  1000000"""
+        , stderr="")
+    , test_case(
+        cmd="""yb_sysprocs_column_dstr.py @{argsdir}/db1 --schema dev --table data_types_t --column col1 --db_driver psycopg2"""
+        , exit_code=0
+        , stdout="""column                         magnitude      rows  to        to    distincts     max      tot
+name                                           per          rows                 rows     rows
+                                                             per
+-----------------------------  -----------  ------  ----  ------  -----------  ------  -------
+{db1}.dev.data_types_t.col1  10^0              1  to         9      1000000       1  1000000"""
+        , stderr="")
+    , test_case(
+        cmd="""yb_sysprocs_column_dstr.py @{argsdir}/db1 --schema dev --table data_types_t --column col1 --report_transport copy"""
+        , exit_code=0
+        , stdout="""column                         magnitude      rows  to        to    distincts     max      tot
+name                                           per          rows                 rows     rows
+                                                             per
+-----------------------------  -----------  ------  ----  ------  -----------  ------  -------
 {db1}.dev.data_types_t.col1  10^0              1  to         9      1000000       1  1000000"""
         , stderr="")
 ]
\ No newline at end of file
@@ -58,6 +58,24 @@ DROP TABLE"""
             , stderr=''
             , map_out=map_out)
 
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --schema_in dev --table_in data_types_t --dst_schema Prod --log_dir tmp"""
+        , exit_code=0
+        , stdout="""-- dev.data_types_t chunk1of1
+2021-03-01 21:04:52.988 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 100 good rows in   0:00:06 (READ:  4.15KB/s WRITE:  2.30KB/s)"""
+        , stderr=''
+        , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2"""
+            """ --src_table dev.data_types_t --table_in data_types_t --log_dir tmp"""
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_to_yb_copy_table.py [options]
+yb_to_yb_copy_table.py: error: the --src_table and --dst_table options can't be used with the table filter arguments"""
+        , map_out=map_out)
+
    , test_case(
         cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
             """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --threads 3"""
@@ -65,4 +83,153 @@ DROP TABLE"""
         , stdout=''
         , stderr="yb_to_yb_copy_table.py: The '--threads' option is only supported for YBDB super users."
         , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2"""
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp"""
+            """ --chunk_rows 1000 --chunk_plan data_types_t.plan.json"""
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_to_yb_copy_table.py [options]
+yb_to_yb_copy_table.py: error: the --chunk_plan and --chunk_rows options can't be used together"""
+        , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2_su --unload_where_clause "col1 <= 2560" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --chunk_rows 1000 --pipelines 2"""
+            """ --log_dir tmp --log_prefix pipelines_"""
+            """ | grep -o 'Loaded [0-9]* good rows' | awk '{{s += $2}} END {{print s}}'"""
+        , exit_code=0
+        , stdout="""2560"""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp"""
+            """ --manifest {argsdir}/copy_table.manifest.json > /dev/null;"""
+            """ {argsdir}/../../yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --log_dir tmp"""
+            """ --resume {argsdir}/copy_table.manifest.json"""
+        , exit_code=0
+        , stdout=''
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2"""
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp"""
+            """ --resume {argsdir}/copy_table.manifest.json"""
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_to_yb_copy_table.py [options]
+yb_to_yb_copy_table.py: error: the tables to copy are read from the --resume manifest, the table arguments can't be set"""
+        , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp"""
+            """ --stats_file {argsdir}/copy_stats.csv > /dev/null; head -1 {argsdir}/copy_stats.csv"""
+        , exit_code=0
+        , stdout="""table,chunk,thread,status,rows,bytes,start_time,end_time,elapsed_seconds,rows_per_second,bytes_per_second"""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --threads auto"""
+        , exit_code=(0 if Common.is_windows else 1)
+        , stdout=''
+        , stderr="yb_to_yb_copy_table.py: The '--threads' option is only supported for YBDB super users."
+        , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2_su --unload_where_clause "col1 <= 2560" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --log_prefix threads_auto_"""
+            """ --threads auto --auto_threads_max 2"""
+            """ | grep -o 'Loaded [0-9]* good rows' | awk '{{s += $2}} END {{print s}}'"""
+        , exit_code=0
+        , stdout="""2560"""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2"""
+            """ --incremental_column col1 --stage_mode load --stage_dir tmp --log_dir tmp"""
+        , exit_code=2
+        , stdout=''
+        , stderr="""usage: yb_to_yb_copy_table.py [options]
+yb_to_yb_copy_table.py: error: the --incremental_column option is used with the --stage_mode unload of the data"""
+        , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2_su --unload_where_clause "col1 <= 2560" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --log_prefix thread_range_"""
+            """ --threads 2 --thread_partition range"""
+            """ | grep -o 'Loaded [0-9]* good rows' | awk '{{s += $2}} END {{print s}}'"""
+        , exit_code=0
+        , stdout="""2560"""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 2560" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --dry_run"""
+            """ --throughput_history {argsdir}/no_throughput_history.json | grep -- '-- total'"""
+        , exit_code=0
+        , stdout="""-- total: 1 units, 2,560 est rows, projected duration with 1 pipelines: unknown, there is no throughput history in {argsdir}/no_throughput_history.json"""
+        , stderr=''
+        , map_out=[ { 'regex' : re.compile(r'[\d,]+ est rows'), 'sub' : 'N est rows' } ])
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --verify"""
+            """ | grep -- '-- verify'"""
+        , exit_code=0
+        , stdout="""-- verify: 1 chunk/thread units and 1 tables checked, no differences"""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --verify --verify_recopy"""
+        , exit_code=(0 if Common.is_windows else 1)
+        , stdout=''
+        , stderr="""yb_to_yb_copy_table.py: The '--verify_recopy' option requires a destination without rows matching the copy, Prod.data_types_t has 100 rows..."""
+        , map_out=[ { 'regex' : re.compile(r'has \d+ rows'), 'sub' : 'has N rows' } ])
+
+   , test_case(
+        cmd=("""yb_exec_ybtool.py @{argsdir}/db1 --ybtool_cmd "ybsql -q -c 'DROP TABLE IF EXISTS dev.incremental_t;"""
+            """ CREATE TABLE dev.incremental_t AS SELECT * FROM dev.data_types_t WHERE col1 <= 100'" > /dev/null 2>&1"""
+            """; {argsdir}/../../yb_exec_ybtool.py @{argsdir}/db2 --ybtool_cmd "ybsql -q -c 'DROP TABLE IF EXISTS dev.incremental_t'" > /dev/null 2>&1"""
+            """; rm -f {argsdir}/incremental_state.json"""
+            """; {argsdir}/../../yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --src_table dev.incremental_t --dst_table dev.incremental_t"""
+            """ --create_dst_table --incremental_column col1 --incremental_state_file {argsdir}/incremental_state.json --log_dir tmp"""
+            """ | grep -oE "^-- incremental copy.*|Loaded [0-9]+ good rows" """
+            """; {argsdir}/../../yb_exec_ybtool.py @{argsdir}/db1 --ybtool_cmd "ybsql -q -c 'INSERT INTO dev.incremental_t"""
+            """ SELECT * FROM dev.data_types_t WHERE col1 > 100 AND col1 <= 150'" > /dev/null 2>&1"""
+            """; {argsdir}/../../yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --src_table dev.incremental_t --dst_table dev.incremental_t"""
+            """ --incremental_column col1 --incremental_state_file {argsdir}/incremental_state.json --log_dir tmp"""
+            """ | grep -oE "^-- incremental copy.*|Loaded [0-9]+ good rows" """
+            """; {argsdir}/../../yb_exec_ybtool.py @{argsdir}/db2 --ybtool_cmd "ybsql -A -t -c 'SELECT COUNT(*) FROM dev.incremental_t'" """
+            """; grep -o '"150"' {argsdir}/incremental_state.json"""
+            """; {argsdir}/../../yb_exec_ybtool.py @{argsdir}/db1 --ybtool_cmd "ybsql -q -c 'DROP TABLE dev.incremental_t'" > /dev/null 2>&1"""
+            """; {argsdir}/../../yb_exec_ybtool.py @{argsdir}/db2 --ybtool_cmd "ybsql -q -c 'DROP TABLE dev.incremental_t'" > /dev/null 2>&1""")
+        , exit_code=0
+        , stdout="""-- incremental copy of dev.incremental_t: col1 <= '100'
+Loaded 100 good rows
+-- incremental copy of dev.incremental_t: col1 > '100' AND col1 <= '150'
+Loaded 50 good rows
+150
+"150\""""
+        , stderr='')
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp"""
+            """ --throughput_history {argsdir}/copy_throughput_history.json > /dev/null"""
+            """; {argsdir}/../../yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --schema_in dev --table_in a1_t data_types_t"""
+            """ --dst_schema Prod --log_dir tmp --dry_run --throughput_history {argsdir}/copy_throughput_history.json"""
+            """ | grep -E -- '^-- (dev[.]|total)' | sed -E 's/ +/ /g'"""
+        , exit_code=0
+        , stdout="""-- dev.data_types_t chunk1of1 1 ROWS CMPR UNCMPR
+-- dev.a1_t chunk1of1 1 ROWS CMPR UNCMPR
+-- total: 2 units, N est rows, projected duration with 1 pipelines: DURATION"""
+        , stderr=''
+        , map_out=[ { 'regex' : re.compile(r'\d+ [\d.]+[KMGT]?B [\d.]+[KMGT]?B$', re.MULTILINE), 'sub' : 'ROWS CMPR UNCMPR' }
+            , { 'regex' : re.compile(r'[\d,]+ est rows'), 'sub' : 'N est rows' }
+            , { 'regex' : re.compile(r'pipelines: \d+:\d{2}:\d{2}$', re.MULTILINE), 'sub' : 'pipelines: DURATION' } ])
 ]
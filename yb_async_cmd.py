@@ -0,0 +1,72 @@
+"""
+Run many commands concurrently with asyncio, used by DBConnect.ybsql_query_concurrent.
+
+This module requires Python 3, it is only imported when concurrent execution is
+requested and Python 2 falls back to running the commands one at a time.
+"""
+import asyncio
+
+from datetime import datetime
+
+from yb_common import Common, Text
+
+
+async def run_cmd(cmd_id, argv, stdin_str, env, semaphore):
+    """Run a single command once a slot in the semaphore is free.
+
+    :param cmd_id: number, identifies the command in verbose output
+    :param argv: list, the executable and its arguments, no shell is used
+    :param stdin_str: string, written to the stdin of the command
+    :param env: dictionary, the complete environment of the command
+    :param semaphore: asyncio.Semaphore limiting the number of running commands
+    :return: tuple of the stdout, stderr, exit code, start time and end time of the command
+    """
+    async with semaphore:
+        start_time = datetime.now()
+        if Common.verbose >= 2:
+            print('%s\n%s' % (
+                Text.color('--Async Cmd Id(%d) Executing--' % cmd_id, style='bold')
+                , stdin_str))
+
+        p = await asyncio.create_subprocess_exec(
+            *argv
+            , stdin=asyncio.subprocess.PIPE
+            , stdout=asyncio.subprocess.PIPE
+            , stderr=asyncio.subprocess.PIPE
+            , env=env)
+        (stdout, stderr) = await p.communicate(stdin_str.encode('utf-8'))
+
+        if Common.verbose >= 2:
+            print('%s: %s, %s: %s' % (
+                Text.color('--Async Cmd Id(%d) Execution duration' % cmd_id, style='bold')
+                , Text.color(datetime.now() - start_time, fg='cyan')
+                , Text.color('Exit code', style='bold')
+                , Text.color(str(p.returncode), fg=('red' if p.returncode else 'cyan'))))
+
+        return (
+            stdout.decode('utf-8', errors='ignore')
+            , stderr.decode('utf-8', errors='ignore')
+            , p.returncode
+            , start_time
+            , datetime.now())
+
+
+async def run_cmds(cmds, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*[
+        run_cmd(cmd['cmd_id'], cmd['argv'], cmd['stdin'], cmd['env'], semaphore)
+        for cmd in cmds])
+
+
+def run_concurrent(cmds, concurrency):
+    """Run the commands with at most concurrency of them running at the same time.
+
+    :param cmds: list of dictionaries with the keys; cmd_id, argv, stdin and env
+    :param concurrency: number, the maximum number of commands running at once
+    :return: list of (stdout, stderr, exit_code, start_time, end_time) tuples in the order of cmds
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run_cmds(cmds, concurrency))
+    finally:
+        loop.close()
@@ -15,7 +15,7 @@ Output:
 """
 import sys
 
-from yb_common import ArgsHandler, Common, StoredProc, Util
+from yb_common import ArgIntRange, ArgsHandler, Common, StoredProc, Util
 from yb_ddl_object import ddl_object
 
 class check_db_views(Util):
@@ -38,12 +38,12 @@ class check_db_views(Util):
         db_ct = 0
         broken_view_ct = 0
         sys.stdout.write('-- Running broken view check.\n')
-        for db in dbs:
+        # the databases are checked concurrently, the results are reported in database order
+        all_cmd_results = StoredProc('yb_check_db_views_p', self.db_conn).call_proc_as_anonymous_block_concurrent(
+            [{'args': {'a_filter':self.db_filter_sql()}, 'pre_sql': ('\c %s\n' % db)} for db in dbs]
+            , concurrency=self.args_handler.args.db_concurrency)
+        for db, cmd_results in zip(dbs, all_cmd_results):
             db_ct += 1
-            cmd_results = StoredProc('yb_check_db_views_p', self.db_conn).call_proc_as_anonymous_block(
-                args = {'a_filter':self.db_filter_sql()}
-                , pre_sql = ('\c %s\n' % db))
-
             broken_views = []
             if cmd_results.exit_code == 0:
                 if len(cmd_results.stdout.strip()):
@@ -74,6 +74,9 @@ class check_db_views(Util):
         args_ddl_grp.add_argument("--fix_views"
             , action='store_true', help="attempts to fix broken views by running a 'CREATE OR REPLACE' with the view ddl"
             ", defaults to False")
+        args_ddl_grp.add_argument("--db_concurrency"
+            , type=ArgIntRange(1,64), default=4
+            , help="the number of databases checked at the same time, defaults to 4")
 
     def replace_broken_view(self, view):
         view_path = view['path'].split('.')
@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+
+import copy
+import json
+import os
+import re
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from datetime import datetime, timedelta
+
+from yb_common import ArgIntRange, Common, CmdResult, StoredProc, Text, Util
+
+class ChunkDMLUtil(Util):
+    """Parent class of the yb_chunk_dml_by_* utilities, the arguments and the execution
+    shared by the chunking stored procs.
+
+    By default the chunk DML runs one chunk at a time inside the anonymous block of the
+    chunking stored proc.  With --parallel_sessions, --state_file, --resume or the chunk
+    plan options the stored proc only prints the chunk predicates, or the predicates are
+    read from a saved chunk plan, and the chunk DML is run by a pool of database sessions,
+    each chunk in its own transaction.
+
+    Each utility sets in its config the chunking stored proc it calls:
+        'chunk_proc_name': the stored proc name, formatted with the utility args
+        'chunk_proc_args': dictionary of the stored proc args that differ per utility,
+            each mapped to the name of the utility arg that is passed
+    """
+    chunk_default_args = {'pre_sql': '', 'chunk_pre_sql': '', 'post_sql': '', 'parallel_sessions': None, 'on_chunk_error': 'stop'
+        , 'state_file': None, 'resume': None, 'save_chunk_plan': None, 'chunk_plan': None
+        , 'target_chunk_seconds': None, 'plan_sample_pct': None}
+    chunk_marker = '>!>CHUNK<!<:'
+    rowcount_marker = '>!>ROWCOUNT<!<:'
+
+    def chunk_proc_name(self):
+        return self.config['chunk_proc_name'].format(**vars(self.args_handler.args))
+
+    def chunk_proc_args(self):
+        """:return: dictionary of the chunking stored proc args that differ per utility"""
+        return dict(
+            (proc_arg, getattr(self.args_handler.args, arg))
+            for (proc_arg, arg) in self.config['chunk_proc_args'].items())
+
+    def table_where_clause(self):
+        """:return: the chunking filter passed to the stored proc, TRUE for the
+            utilities that don't filter
+        """
+        return self.chunk_proc_args().get('a_table_where_clause') or 'TRUE'
+
+    def call_chunk_proc(self, dml, print_chunk_dml, execute_chunk_dml, pre_sql='', post_sql=''):
+        args = self.chunk_proc_args()
+        args.update({
+            'a_dml'                 : dml
+            , 'a_min_chunk_size'    : self.args_handler.args.chunk_rows
+            , 'a_verbose'           : ('TRUE' if self.args_handler.args.verbose_chunk_off else 'FALSE')
+            , 'a_add_null_chunk'    : ('TRUE' if self.args_handler.args.null_chunk_off else 'FALSE')
+            , 'a_print_chunk_dml'   : ('TRUE' if print_chunk_dml else 'FALSE')
+            , 'a_execute_chunk_dml' : ('TRUE' if execute_chunk_dml else 'FALSE')})
+
+        return StoredProc(self.chunk_proc_name(), self.db_conn).call_proc_as_anonymous_block(
+            args = args
+            , pre_sql = pre_sql
+            , post_sql = post_sql)
+
+    def execute(self):
+        args = self.args_handler.args
+        if not (args.parallel_sessions or args.state_file or args.resume
+            or args.save_chunk_plan or args.chunk_plan or args.target_chunk_seconds
+            or args.plan_sample_pct or args.chunk_pre_sql):
+            self.cmd_results = self.call_chunk_proc(
+                args.dml
+                , args.print_chunk_dml
+                , args.execute_chunk_dml
+                , pre_sql = args.pre_sql
+                , post_sql = args.post_sql)
+            return
+
+        self.state_file = (args.resume or args.state_file
+            or '%s_%s.state.json' % (
+                os.path.splitext(Common.util_file_name)[0], datetime.now().strftime('%Y%m%d_%H%M%S')))
+        if args.pre_sql and not args.resume:
+            # like the stored proc path, the pre_sql runs once before the table is chunked
+            self.cmd_results = self.db_conn.ybsql_query(args.pre_sql)
+            if self.cmd_results.exit_code:
+                return
+
+        if args.resume:
+            chunks = self.read_state()
+        elif args.chunk_plan:
+            chunks = self.read_chunk_plan()
+        else:
+            chunks = self.get_sampled_chunks() if args.plan_sample_pct else self.get_chunks()
+            if args.save_chunk_plan:
+                self.write_chunk_plan(chunks)
+        if args.print_chunk_dml:
+            for chunk in chunks:
+                print('%s;' % self.chunk_dml(chunk))
+
+        if args.execute_chunk_dml:
+            self.execute_parallel(chunks)
+        else:
+            self.cmd_results = CmdResult()
+
+    def get_chunks(self):
+        """Run the chunking stored proc without executing the DML, the DML is reduced
+        to a marked '<chunk_where_clause>' so the printed DML is the chunk predicate.
+
+        :return: list of chunk dictionaries with the keys; chunk, size and where_clause,
+            size is None for the NULL chunk
+        """
+        cmd_results = self.call_chunk_proc(
+            '%s<chunk_where_clause>' % self.chunk_marker, True, False)
+        if cmd_results.exit_code:
+            cmd_results.write()
+            exit(cmd_results.exit_code)
+
+        chunks = []
+        for line in cmd_results.stdout.split('\n'):
+            if line.startswith(self.chunk_marker):
+                where_clause = line[len(self.chunk_marker):].rstrip()
+                if where_clause.endswith(';'):
+                    where_clause = where_clause[:-1]
+                size = re.search(r'chunk_clause\(chunk: \d+, size: (\d+)\)', where_clause)
+                chunks.append({
+                    'chunk': len(chunks) + 1
+                    , 'size': (int(size.group(1)) if size else None)
+                    , 'where_clause': where_clause
+                    , 'status': 'pending' })
+            elif line.strip() != '':
+                # the --verbose_chunk_off chunking details
+                print(line)
+
+        return chunks
+
+    def sample_column_sql(self):
+        """:return: the chunking column SQL expression the sampled chunk boundaries are read from"""
+        return self.args_handler.args.column
+
+    def sample_boundary_literal(self, value):
+        """:return: the SQL literal of a sampled chunk boundary"""
+        return value
+
+    def get_sampled_chunks(self):
+        """Estimate the chunks from a --plan_sample_pct random sample of the table, instead
+        of the exact group counts of the chunking stored proc.  Each sampled row stands
+        for 100 / --plan_sample_pct rows and a boundary is read every --chunk_rows
+        estimated rows.  The first and the last chunk are open ended so the rows outside
+        of the sampled values are not missed.
+
+        The RANDOM() predicate is still evaluated on every row of the table, so the
+        sample costs a full scan, only the sort and the window aggregates are limited
+        to the sampled rows.
+
+        :return: list of chunk dictionaries like get_chunks, the sizes are estimates and
+            are labeled 'estimated size' in the chunk clause
+        """
+        args = self.args_handler.args
+        sample_fraction = args.plan_sample_pct / 100.0
+        cmd_results = self.db_conn.query_rows("""WITH
+sample AS (
+    SELECT {value} AS value
+    FROM {table}
+    WHERE {column} IS NOT NULL AND ({table_where_clause}) AND RANDOM() < {sample_fraction}
+)
+, ranked AS (
+    SELECT
+        value
+        , ROW_NUMBER() OVER (ORDER BY value) AS rn
+        , COUNT(*) OVER () AS cnt
+    FROM sample
+)
+SELECT rn, value::VARCHAR AS value, cnt
+FROM ranked
+WHERE MOD(rn - 1, {step}) = 0
+ORDER BY rn""".format(
+            value = self.sample_column_sql()
+            , table = args.table
+            , column = args.column
+            , table_where_clause = self.table_where_clause()
+            , sample_fraction = sample_fraction
+            , step = max(1, int(round(args.chunk_rows * sample_fraction)))))
+        cmd_results.on_error_exit()
+
+        sample_rows = 0
+        boundaries = []
+        for (rn, value, cnt) in cmd_results.rows:
+            sample_rows = int(cnt)
+            if not boundaries or boundaries[-1][1] != value:
+                boundaries.append((int(rn), value))
+
+        # the first boundary is the sample minimum, the first chunk has no lower bound
+        column = args.column
+        literal = self.sample_boundary_literal
+        cuts = boundaries[1:]
+        if cuts:
+            predicates = [('%s < %s' % (column, literal(cuts[0][1])), cuts[0][0] - 1)]
+            for (low, high) in zip(cuts, cuts[1:]):
+                predicates.append((
+                    '%s <= %s AND %s < %s' % (literal(low[1]), column, column, literal(high[1]))
+                    , high[0] - low[0]))
+            predicates.append(('%s >= %s' % (column, literal(cuts[-1][1])), sample_rows - cuts[-1][0] + 1))
+        else:
+            predicates = [('%s IS NOT NULL' % column, sample_rows)]
+
+        chunks = [{
+                'chunk': chunk
+                , 'size': int(round(sample_size / sample_fraction))
+                , 'where_clause': '/* chunk_clause(chunk: %d, estimated size: %d) >>>*/ %s /*<<< chunk_clause */' % (
+                    chunk, int(round(sample_size / sample_fraction)), predicate)
+                , 'status': 'pending' }
+            for (chunk, (predicate, sample_size)) in enumerate(predicates, 1)]
+        if args.null_chunk_off:
+            chunks.append({
+                'chunk': len(chunks) + 1
+                , 'size': None
+                , 'where_clause': '%s IS NULL' % column
+                , 'status': 'pending' })
+
+        if args.verbose_chunk_off:
+            for chunk in chunks:
+                print('--Chunk: %d, Estimated Rows: %s, %s' % (
+                    chunk['chunk'], ('?' if chunk['size'] is None else chunk['size'])
+                    , re.sub(r'^/\*.*?\*/ | /\*.*?\*/$', '', chunk['where_clause'])))
+            print('--Sampled rows       : %d, %s%% of about %d rows' % (
+                sample_rows, args.plan_sample_pct, int(round(sample_rows / sample_fraction))))
+            print('--Total Chunks       : %d' % len(chunks))
+
+        return chunks
+
+    def chunk_dml(self, chunk):
+        return self.args_handler.args.dml.rstrip().rstrip(';').replace(
+            '<chunk_where_clause>', chunk['where_clause'])
+
+    def chunk_sql(self, chunk):
+        """The chunk DML wrapped in an anonymous block that raises the rowcount of the DML."""
+        return """{chunk_pre_sql}
+DO $CHUNK$
+DECLARE
+    v_rowcount BIGINT;
+BEGIN
+    EXECUTE $CHUNK_DML${dml}$CHUNK_DML$;
+    GET DIAGNOSTICS v_rowcount = ROW_COUNT;
+    RAISE INFO '{rowcount_marker}%', v_rowcount;
+END $CHUNK$;""".format(
+            chunk_pre_sql = self.args_handler.args.chunk_pre_sql
+            , dml = self.chunk_dml(chunk)
+            , rowcount_marker = self.rowcount_marker)
+
+    def execute_parallel(self, chunks):
+        """Run the chunk DML through --parallel_sessions database sessions, each chunk
+        is a separate transaction.  The chunk_pre_sql is run before each chunk, in the
+        same ybsql call, and the post_sql is run once after all the chunks succeeded.
+
+        The chunks and their status are written to the state file as each chunk
+        completes, --resume reruns the chunks of a state file that are not done.
+        """
+        start_time = datetime.now()
+        for chunk in chunks:
+            if chunk['status'] != 'done':
+                chunk['status'] = 'pending'
+        self.write_state(chunks)
+        if self.args_handler.args.target_chunk_seconds and not any(self.chunk_range(chunk) for chunk in chunks):
+            Common.error('the chunks are not ranges that can be combined, --target_chunk_seconds is ignored'
+                , exit_code=None, color='yellow')
+        self.next_chunk_i = 0
+        self.run_stats = []
+        lock = threading.Lock()
+        stop = threading.Event()
+        worker_errors = []
+
+        def run_chunks():
+            # every worker has its own connection and so its own ybsql session
+            db_conn = copy.deepcopy(self.db_conn)
+            try:
+                while not stop.is_set():
+                    run = None
+                    try:
+                        with lock:
+                            run = self.next_run(chunks)
+                            if not run:
+                                break
+                            for chunk in run:
+                                chunk['status'] = 'running'
+                            self.write_state(chunks)
+                        self.run_chunks_run(db_conn, run, chunks, lock, stop)
+                    except Exception as error:
+                        # an unexpected error fails the run instead of leaving its chunks running
+                        with lock:
+                            worker_errors.append(error)
+                            if run:
+                                self.set_run_result(run, 'failed', 1, 0, 0, stop)
+                                self.print_chunk_result(run, len(chunks), 0, 'chunk run failed: %s' % error)
+                            else:
+                                stop.set()
+                                Common.error('chunk run failed: %s' % error, exit_code=None)
+                            try:
+                                self.write_state(chunks)
+                            except (IOError, OSError):
+                                None
+            finally:
+                db_conn.ybsql_session_close()
+
+        workers = [threading.Thread(target=run_chunks)
+            for worker in range(min(self.args_handler.args.parallel_sessions or 1
+                , len([chunk for chunk in chunks if chunk['status'] == 'pending'])))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        failed = [chunk for chunk in chunks if chunk['status'] == 'failed']
+        done = [chunk for chunk in chunks if chunk['status'] == 'done']
+        exit_code = (failed[0]['exit_code'] or 1) if failed else (1 if worker_errors else 0)
+        print('-- %d of %d chunks completed, %d failed, %d not run, %d rows in %s' % (
+            len(done), len(chunks), len(failed), len(chunks) - len(done) - len(failed)
+            , sum(chunk['rowcount'] for chunk in done), datetime.now() - start_time))
+
+        self.cmd_results = CmdResult(exit_code=exit_code)
+        if len(done) < len(chunks):
+            print('-- the chunked DML can be resumed with: --resume %s' % self.state_file)
+        elif self.args_handler.args.post_sql:
+            self.cmd_results = self.db_conn.ybsql_query(self.args_handler.args.post_sql)
+
+    def run_chunks_run(self, db_conn, run, chunks, lock, stop):
+        """Run the DML of a run of chunks and record its result."""
+        run_start_time = datetime.now()
+        cmd_result = db_conn.ybsql_query(self.chunk_sql(self.run_chunk(run)))
+        seconds = (datetime.now() - run_start_time).total_seconds()
+        rowcount = re.search(r'%s(\d+)' % re.escape(self.rowcount_marker), cmd_result.stderr)
+        with lock:
+            if cmd_result.exit_code or not rowcount:
+                self.set_run_result(run, 'failed', cmd_result.exit_code or 1, 0, seconds, stop)
+            else:
+                self.set_run_result(run, 'done', None, int(rowcount.group(1)), seconds, stop)
+                self.run_stats.append((run[0]['rowcount'], seconds))
+            self.write_state(chunks)
+            self.print_chunk_result(run, len(chunks), seconds, cmd_result.stderr.strip())
+
+    def set_run_result(self, run, status, exit_code, rowcount, seconds, stop):
+        """Set the status of the chunks of a run, a failed run sets the stop event with
+        --on_chunk_error stop.
+        """
+        for chunk in run:
+            chunk['status'] = status
+            if exit_code:
+                chunk['exit_code'] = exit_code
+            # the rowcount and duration of the run are recorded on its first chunk
+            chunk['rowcount'] = rowcount if chunk is run[0] else 0
+            chunk['seconds'] = round(seconds, 3) if chunk is run[0] else 0
+        if status == 'failed' and self.args_handler.args.on_chunk_error == 'stop':
+            stop.set()
+
+    @staticmethod
+    def chunk_range(chunk):
+        """:return: the (low, column, high) of a 'low <= column AND column < high'
+            chunk predicate, None for other predicates like the NULL chunk and the open
+            ended first and last sampled chunks.  The low and high are the literals as
+            written by the chunking stored proc, like 20200101 for the integer procs and
+            TO_TIMESTAMP('2020-01-01 00:00:00','YYYY-MM-DD HH24:MI:SS') for the date part
+            proc, adjacent chunks share the same literal
+        """
+        match = re.search(r'>>>\*/ (.*?) <= (.+?) AND \2 < (.*) /\*<<< chunk_clause \*/$', chunk['where_clause'])
+        return match.groups() if match else None
+
+    def target_chunk_rows(self):
+        """:return: the rows a chunk should have to run for --target_chunk_seconds, from
+            the rows/s, the DML rowcount per second, of the last completed chunks, None
+            until a chunk completed
+        """
+        if not (self.args_handler.args.target_chunk_seconds and self.run_stats):
+            return None
+        recent = self.run_stats[-5:]
+        rows_per_second = sum(rows for (rows, seconds) in recent) / max(sum(seconds for (rows, seconds) in recent), 0.001)
+        return rows_per_second * self.args_handler.args.target_chunk_seconds
+
+    def next_run(self, chunks):
+        """:return: the list of the next pending chunks to run as 1 DML, None when there are
+            none.  With --target_chunk_seconds adjacent chunks are combined up to the
+            target rows, the first chunks run alone to time them.
+        """
+        while self.next_chunk_i < len(chunks) and chunks[self.next_chunk_i]['status'] != 'pending':
+            self.next_chunk_i += 1
+        if self.next_chunk_i == len(chunks):
+            return None
+
+        run = [chunks[self.next_chunk_i]]
+        self.next_chunk_i += 1
+        target_rows = self.target_chunk_rows()
+        rows = run[0]['size'] or 0
+        while target_rows and self.next_chunk_i < len(chunks):
+            chunk = chunks[self.next_chunk_i]
+            last_range = self.chunk_range(run[-1])
+            chunk_range = self.chunk_range(chunk)
+            if (chunk['status'] != 'pending' or not (last_range and chunk_range)
+                or last_range[1] != chunk_range[1] or last_range[2] != chunk_range[0]
+                or rows + (chunk['size'] or 0) > target_rows):
+                break
+            run.append(chunk)
+            rows += chunk['size'] or 0
+            self.next_chunk_i += 1
+
+        return run
+
+    def run_chunk(self, run):
+        """:return: a chunk with 1 predicate that covers all the chunks of the run"""
+        if len(run) == 1:
+            return run[0]
+        (low, column, high) = self.chunk_range(run[0])
+        high = self.chunk_range(run[-1])[2]
+        return {'where_clause':
+            '/* chunk_clause(chunk: %d-%d, size: %d) >>>*/ %s <= %s AND %s < %s /*<<< chunk_clause */' % (
+                run[0]['chunk'], run[-1]['chunk'], sum(chunk['size'] or 0 for chunk in run)
+                , low, column, column, high)}
+
+    def chunk_plan_source(self):
+        """:return: dictionary of what a chunk plan was computed for, a plan is only
+            reused for the same source
+        """
+        return {
+            'conn': self.state_conn()
+            , 'table': self.args_handler.args.table
+            , 'column': self.args_handler.args.column
+            , 'table_where_clause': self.table_where_clause()
+            , 'null_chunk': self.args_handler.args.null_chunk_off }
+
+    def write_chunk_plan(self, chunks):
+        """Write the chunk predicates and row counts to the --save_chunk_plan file."""
+        plan = self.chunk_plan_source()
+        plan.update({
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'chunk_rows': self.args_handler.args.chunk_rows
+            , 'sizes': ('estimated from a %s%% sample' % self.args_handler.args.plan_sample_pct
+                if self.args_handler.args.plan_sample_pct else 'exact')
+            , 'chunks': [
+                dict((key, chunk[key]) for key in ('chunk', 'size', 'where_clause'))
+                for chunk in chunks] })
+
+        tmp_file_name = '%s.%d.tmp' % (self.args_handler.args.save_chunk_plan, os.getpid())
+        with open(tmp_file_name, 'w') as plan_file:
+            json.dump(plan, plan_file, indent=4)
+        getattr(os, 'replace', os.rename)(tmp_file_name, self.args_handler.args.save_chunk_plan)
+        print('-- saved the %d chunk plan to: %s' % (len(chunks), self.args_handler.args.save_chunk_plan))
+
+    def read_chunk_plan(self):
+        """Read the chunks of the --chunk_plan file instead of scanning the table, the
+        plan rows are as of when the plan was saved.
+        """
+        try:
+            with open(self.args_handler.args.chunk_plan, 'r') as plan_file:
+                plan = json.load(plan_file)
+        except (IOError, OSError, ValueError) as error:
+            Common.error('invalid chunk plan file: %s' % error)
+
+        for (key, value) in self.chunk_plan_source().items():
+            if plan.get(key) != value:
+                Common.error(Text.color(
+                    "The --chunk_plan was saved for the %s: %s, not: %s..."
+                        % (key, plan.get(key), value)
+                    , 'yellow'))
+
+        for chunk in plan['chunks']:
+            chunk['status'] = 'pending'
+        return plan['chunks']
+
+    def state_conn(self):
+        return {'host': self.db_conn.env['host'], 'database': self.db_conn.database}
+
+    def write_state(self, chunks):
+        """Write the chunks and the status of each chunk to the state file."""
+        state = {
+            'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'util': Common.util_file_name
+            , 'conn': self.state_conn()
+            , 'table': self.args_handler.args.table
+            , 'dml': self.args_handler.args.dml
+            , 'chunks': [
+                dict((key, chunk.get(key)) for key in (
+                    'chunk', 'size', 'where_clause', 'status', 'rowcount', 'exit_code', 'seconds'))
+                for chunk in chunks] }
+
+        tmp_file_name = '%s.%d.tmp' % (self.state_file, os.getpid())
+        with open(tmp_file_name, 'w') as state_file:
+            json.dump(state, state_file, indent=4)
+        getattr(os, 'replace', os.rename)(tmp_file_name, self.state_file)
+
+    def read_state(self):
+        """Read the chunks of a previous run from the --resume state file, the chunk
+        plan is reused as is since the DML that did run may have changed the table.
+        """
+        try:
+            with open(self.state_file, 'r') as state_file:
+                state = json.load(state_file)
+        except (IOError, OSError, ValueError) as error:
+            Common.error('invalid state file: %s' % error)
+
+        for (key, value) in (
+            ('util', Common.util_file_name), ('conn', self.state_conn())
+            , ('table', self.args_handler.args.table), ('dml', self.args_handler.args.dml)):
+            if state.get(key) != value:
+                Common.error(Text.color(
+                    "The --resume state file was created for the %s: %s, not: %s..."
+                        % (key, state.get(key), value)
+                    , 'yellow'))
+
+        chunks = state['chunks']
+        running = [str(chunk['chunk']) for chunk in chunks if chunk['status'] == 'running']
+        if running:
+            # the run ended without a result for these chunks, they may have committed, so
+            #   running their DML again could apply it twice, like inserting duplicate rows
+            if not self.args_handler.args.rerun_running:
+                Common.error(Text.color(
+                    "chunk/s %s were running when the previous run ended and may have committed,"
+                    " check the table then set their status to done in the state file or run"
+                    " them again with --rerun_running..." % ', '.join(running)
+                    , 'yellow'))
+            Common.error(Text.color(
+                "chunk/s %s were running when the previous run ended, they are run again"
+                    % ', '.join(running)
+                , 'yellow'), exit_code=None)
+        for chunk in chunks:
+            if chunk['status'] != 'done':
+                chunk['status'] = 'pending'
+        print('-- resuming, %d of %d chunks are done' % (
+            len([chunk for chunk in chunks if chunk['status'] == 'done']), len(chunks)))
+
+        return chunks
+
+    def print_chunk_result(self, run, total_chunks, seconds, error):
+        duration = timedelta(seconds=seconds)
+        chunk_label = ('chunk %d of %d' % (run[0]['chunk'], total_chunks)
+            if len(run) == 1
+            else 'chunks %d-%d of %d' % (run[0]['chunk'], run[-1]['chunk'], total_chunks))
+        if run[0]['status'] == 'done':
+            print('-- %s: %d rows in %s' % (chunk_label, run[0]['rowcount'], duration))
+        else:
+            print('-- %s: %s after %s' % (chunk_label, Text.color('FAILED', 'red'), duration))
+            Common.error(error, exit_code=None)
+
+    def add_chunk_optional_args(self, args_chunk_o_grp):
+        args_chunk_o_grp.add_argument("--verbose_chunk_off", action="store_false"
+            , help="don't print additional chunking details, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--null_chunk_off", action="store_false"
+            , help="don't create a chunk where the chunking column is NULL, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--print_chunk_dml", action="store_true"
+            , help="print the chunked DML, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--execute_chunk_dml", action="store_true"
+            , help="execute the chunked DML, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--pre_sql", default=''
+            , help="SQL to run once before the chunking DML, only runs if execute_chunk_dml is set,"
+                " when the chunks are run as with --parallel_sessions the pre_sql runs in its own"
+                " session, so it can't create temporary tables for the chunks, and it is not run"
+                " again by --resume")
+        args_chunk_o_grp.add_argument("--chunk_pre_sql", default=''
+            , help="SQL to run before each chunk DML in the same session, like SET statements,"
+                " the chunks are run as with --parallel_sessions")
+        args_chunk_o_grp.add_argument("--post_sql", default=''
+            , help="SQL to run after the chunking DML, only runs if execute_chunk_dml is set")
+
+        args_parallel_grp = self.args_handler.args_parser.add_argument_group(
+            'parallel chunk execution arguments')
+        args_parallel_grp.add_argument("--parallel_sessions", type=ArgIntRange(1,64)
+            , help="execute the chunked DML through a pool of this many database sessions,"
+                " each chunk is run and committed as a separate transaction, the pre_sql is"
+                " run once before the chunks and the post_sql once after all the chunks,"
+                " requires --execute_chunk_dml")
+        args_parallel_grp.add_argument("--on_chunk_error", choices=['stop', 'continue'], default='stop'
+            , help="when a chunk fails, stop starting new chunks or continue with the"
+                " remaining chunks, defaults to stop")
+        args_parallel_grp.add_argument("--target_chunk_seconds", metavar='SECONDS', type=ArgIntRange(1,86400)
+            , help="combine adjacent chunks so that each DML runs for about SECONDS, the rows/s of"
+                " the completed chunks sizes the next chunks, --chunk_rows is then the size of the"
+                " chunks that are combined and should run well under SECONDS, the chunks are run"
+                " as with --parallel_sessions")
+        args_parallel_grp.add_argument("--state_file", metavar='STATE_FILE'
+            , help="file where the chunks and the status of each chunk are written as the chunks"
+                " complete, the chunks are run as with --parallel_sessions, defaults to a"
+                " <utility>_<timestamp>.state.json file in the current directory")
+        args_parallel_grp.add_argument("--resume", metavar='STATE_FILE'
+            , help="resume a failed run from its state file, only the chunks that are not done are run,"
+                " the DML, table and connection must be the same as the failed run")
+        args_parallel_grp.add_argument("--rerun_running", action="store_true"
+            , help="with --resume, also run the chunks that were running when the failed run ended,"
+                " these chunks may have committed, without this option the resume stops")
+
+        args_plan_grp = self.args_handler.args_parser.add_argument_group(
+            'chunk plan arguments')
+        args_plan_grp.add_argument("--save_chunk_plan", metavar='PLAN_FILE'
+            , help="save the chunk predicates and row counts to a plan file, the plan can be"
+                " reused with --chunk_plan to run other DML on the same table")
+        args_plan_grp.add_argument("--plan_sample_pct", metavar='PCT', type=float
+            , help="estimate the chunk boundaries from a random sample of PCT percent of the table rows,"
+                " instead of the exact group counts, the table is still scanned once to draw the sample,"
+                " only the sorting and counting is reduced to the sampled rows, the chunk sizes are"
+                " then approximate, the chunks are run as with --parallel_sessions")
+        args_plan_grp.add_argument("--chunk_plan", metavar='PLAN_FILE'
+            , help="use the chunks of a plan saved with --save_chunk_plan instead of scanning the"
+                " table, the table, column and chunking filters must be the same as the saved plan,"
+                " the chunks are run as with --parallel_sessions")
+
+    def additional_args_process(self):
+        if '<chunk_where_clause>' not in self.args_handler.args.dml:
+            self.args_handler.args_parser.error("DML must contain the string '<chunk_where_clause>'")
+
+        for option in ('parallel_sessions', 'target_chunk_seconds', 'state_file', 'resume', 'chunk_pre_sql'):
+            if getattr(self.args_handler.args, option) and not self.args_handler.args.execute_chunk_dml:
+                self.args_handler.args_parser.error("the --%s option requires --execute_chunk_dml" % option)
+
+        if self.args_handler.args.state_file and self.args_handler.args.resume:
+            self.args_handler.args_parser.error("the --state_file and --resume options can't be used together")
+
+        if self.args_handler.args.rerun_running and not self.args_handler.args.resume:
+            self.args_handler.args_parser.error("the --rerun_running option requires --resume")
+
+        if self.args_handler.args.chunk_plan and (
+            self.args_handler.args.save_chunk_plan or self.args_handler.args.resume):
+            self.args_handler.args_parser.error(
+                "the --chunk_plan option can't be used with --save_chunk_plan or --resume")
+
+        if self.args_handler.args.plan_sample_pct is not None:
+            if not (0 < self.args_handler.args.plan_sample_pct <= 100):
+                self.args_handler.args_parser.error("the --plan_sample_pct option must be greater than 0 and at most 100")
+            if self.args_handler.args.chunk_plan or self.args_handler.args.resume:
+                self.args_handler.args_parser.error(
+                    "the --plan_sample_pct option can't be used with --chunk_plan or --resume")
+
+        if not self.args_handler.args.execute_chunk_dml:
+            self.args_handler.args.pre_sql = ''
+            self.args_handler.args.post_sql = ''
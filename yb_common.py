@@ -4,11 +4,16 @@ and command execution that are common to all utilities in this package.
 """
 
 import argparse
+import atexit
 import base64
+import collections
 import copy
 import csv
 import getpass
 import gzip
+import hashlib
+import hmac
+import json
 import os
 import platform
 import pprint
@@ -19,8 +24,13 @@ import shlex
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import traceback
+try:
+    import queue                  # for python3
+except:
+    import Queue as queue         # for python2
 from distutils.spawn import find_executable
 from datetime import datetime, date
 from glob import glob
@@ -226,19 +236,37 @@ class Common:
 
 class Cmd:
     cmd_ct = 0
-    def __init__(self, cmd_str, escape_dollar=True, stack_level=2, wait=True, stdin=None):
+    cmd_ct_lock = threading.Lock()
+    def __init__(self, cmd_str, escape_dollar=True, stack_level=2, wait=True, stdin=None
+        , stream=False, strip_warnings=[], env=None):
         """Spawn a new process to execute the given command.
 
         Example: cmd = Cmd('env | grep -i path')
 
+        Example streaming the output:
+            cmd = Cmd('cat big_file', stream=True)
+            for line in cmd:
+                ...
+            cmd.on_error_exit()
+
         :param cmd_str: string, representing the command to execute
         :param escape_dollar: boolean, places a back slash before each $ in the cmd
         :param stack_level: number, used in verbose mode to print where in the python
                             code this Cmd was called
         :param wait: boolean, wait on the cmd results
+        :param stream: boolean, don't wait on the cmd, instead iterate over the cmd
+                       to get the stdout line by line as it is produced, stderr is
+                       collected separately and the exit_code and stderr are set
+                       once the iteration completes, stdout is not retained
+        :param strip_warnings: list of regex patterns removed from the stderr
+        :param env: dictionary, the complete environment of the cmd process, defaults
+                    to the environment of this process.  Passing the environment
+                    instead of changing os.environ keeps concurrent Cmds from different
+                    threads, each with its own credentials, from interfering
         """
-        Cmd.cmd_ct += 1
-        self.cmd_id = Cmd.cmd_ct
+        self.cmd_id = Cmd.next_cmd_id()
+        self.stream = stream
+        self.strip_warnings = strip_warnings
 
         if Common.is_windows:
             cmd_str = self.windows_pre_cmd(cmd_str)
@@ -271,7 +299,11 @@ class Cmd:
             , stdin=subprocess.PIPE
             , stdout=subprocess.PIPE
             , stderr=subprocess.PIPE
-            , shell=not(Common.is_windows))
+            , shell=not(Common.is_windows)
+            , env=env)
+        self.spawn_duration = datetime.now() - self.start_time
+        self.bytes_in = len(cmd_str)
+        self.stream_bytes = 0
 
         # TODO the handling of streamed input/output needs alot of work
         # check to see if data is being piped in to the cmd
@@ -280,12 +312,27 @@ class Cmd:
         elif isinstance(stdin, str) and stdin:
             self.p.communicate()[0]
 
-        if wait:
+        if stream:
+            self.p.stdin.close()
+            # stderr is drained in the background so a chatty stderr can't block
+            #   the process while the stdout is being consumed
+            self.stderr_chunks = []
+            self.stderr_thread = threading.Thread(
+                target=lambda: self.stderr_chunks.extend(iter(self.p.stderr.readline, b'')))
+            self.stderr_thread.daemon = True
+            self.stderr_thread.start()
+        elif wait:
             self.wait()
 
         if Common.is_windows:
             cmd_str = self.windows_post_cmd()
 
+    @staticmethod
+    def next_cmd_id():
+        with Cmd.cmd_ct_lock:
+            Cmd.cmd_ct += 1
+            return Cmd.cmd_ct
+
     def windows_pre_cmd(self, cmd_str):
         self.prefix = ".YbEasyCli_Cmd_"
         fd, self.tmp_ps1_file = tempfile.mkstemp(prefix=self.prefix, suffix=".ps1")
@@ -316,16 +363,78 @@ class Cmd:
             except:
                 None
 
-    def wait(self):
+    def __iter__(self):
+        return self.iter_lines()
+
+    def iter_lines(self, keepends=False):
+        """Yield the stdout of a streaming Cmd one decoded line at a time, only one
+        line is held in memory.  The Cmd is waited on after the last line, or when the
+        iteration ends early on a break or an exception, so the exit_code and stderr
+        are always set when the iteration ends.
+
+        :param keepends: boolean, keep the line ending on each line
+        """
+        completed = False
+        try:
+            for line in iter(self.p.stdout.readline, b''):
+                self.stream_bytes += len(line)
+                line = line.decode("utf-8", errors='ignore')
+                yield line if keepends else line.rstrip('\r\n')
+            completed = True
+        finally:
+            self.wait(stop=not completed)
+
+    def iter_chunks(self, chunk_size=1048576):
+        """Yield the stdout of a streaming Cmd in raw byte blocks of up to chunk_size
+        bytes, for binary or bulk output.  The Cmd is waited on after the last block,
+        or when the iteration ends early, like iter_lines.
+
+        :param chunk_size: number, the maximum bytes per block
+        """
+        completed = False
+        try:
+            for chunk in iter(lambda: self.p.stdout.read(chunk_size), b''):
+                self.stream_bytes += len(chunk)
+                yield chunk
+            completed = True
+        finally:
+            self.wait(stop=not completed)
+
+    def wait(self, stop=False):
+        """Wait for the Cmd to end and set its exit_code, stdout and stderr.
+
+        :param stop: boolean, a streaming Cmd whose output is no longer read is stopped
+        """
         #(stdout, stderr) = map(bytes.decode, p.communicate())
         #TODO change the decode to reflect coding used in the DB connection
-        (stdout, stderr) = self.p.communicate()
+        if self.stream:
+            if hasattr(self, 'exit_code'):
+                return
+            # the stdout was already consumed by iter_lines, closing it early
+            #   ends a process whose output is no longer read with a broken pipe
+            self.p.stdout.close()
+            if stop and self.p.poll() is None:
+                # a process that is not writing, or ignores the broken pipe, is stopped
+                self.p.terminate()
+            self.p.wait()
+            self.stderr_thread.join()
+            (stdout, stderr) = (b'', b''.join(self.stderr_chunks))
+        else:
+            (stdout, stderr) = self.p.communicate()
         self.exit_code = self.p.returncode
         self.stdout = stdout.decode("utf-8", errors='ignore')
         self.stderr = stderr.decode("utf-8", errors='ignore')
+        for warning in self.strip_warnings:
+            self.stderr = re.sub(warning, '', self.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
 
         end_time = datetime.now()
 
+        if Profiler.enabled:
+            Profiler.record(self, 'cmd', end_time, spawn=self.spawn_duration, bytes_in=self.bytes_in
+                , bytes_out=(len(stdout) + len(stderr) + self.stream_bytes))
+            if hasattr(self, 'query_tag'):
+                Profiler.set_query_tag(self, self.query_tag)
+
         if Common.verbose >= 2:
             print(
                 '%s: %s\n%s: %s\n%s\n%s%s\n%s'
@@ -336,7 +445,7 @@ class Cmd:
                     , Text.color(
                         str(self.exit_code)
                         , fg=('red' if self.exit_code else 'cyan'))
-                    , Text.color('--Stdout--', style='bold')
+                    , Text.color('--Stdout%s--' % (' streamed' if self.stream else ''), style='bold')
                     , self.stdout.rstrip()
                     , Text.color('--Stderr--', style='bold')
                     , Text.color(self.stderr.rstrip(), fg='red')))
@@ -358,6 +467,358 @@ class Cmd:
                 self.write(head,tail)
             exit(self.exit_code)
 
+class CmdResult(Cmd):
+    def __init__(self, cmd_str='', stdout='', stderr='', exit_code=0):
+        """A completed Cmd like result for work that did not spawn its own process,
+        for example a statement run through a YbsqlSession.
+
+        :param cmd_str: string, the command or SQL that produced the result
+        :param stdout: string, the output of the command
+        :param stderr: string, the error output of the command
+        :param exit_code: number, the exit code of the command
+        """
+        self.cmd_id = Cmd.next_cmd_id()
+        self.cmd_dtr = cmd_str
+        self.start_time = datetime.now()
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+class YbsqlSession:
+    def __init__(self, db_conn, init_sql=None):
+        """Start a long lived ybsql process that many statements are streamed into,
+        so that the database login is only performed once.
+
+        Each statement is followed by an '\\echo' of a marker to stdout and a
+        '\\!' shell echo of the same marker to stderr.  Both streams are then read
+        up to the marker which demultiplexes the output per statement.  The
+        session runs with ON_ERROR_STOP, so a failed statement ends the ybsql
+        process with the same exit code as a one off ybsql call and the next
+        statement starts a new session.
+
+        :param db_conn: the DBConnect object the session logs in with
+        :param init_sql: SQL and ybsql settings run once when the session starts
+        """
+        self.env = db_conn.env.copy()
+        # the marker is also echoed by a shell, so it only contains shell safe characters
+        self.marker_prefix = 'YbEasyCli_session_marker_%s_' % Common.get_uid()
+        self.stmt_ct = 0
+        self.stderr_lines = queue.Queue()
+
+        ybsql_args = db_conn.ybsql_argv(DBConnect.ybsql_default_options)
+
+        if Common.verbose >= 2:
+            print('%s: %s' % (
+                Text.color('--Starting ybsql session', style='bold')
+                , ' '.join(ybsql_args)))
+
+        self.p = subprocess.Popen(
+            ybsql_args
+            , stdin=subprocess.PIPE
+            , stdout=subprocess.PIPE
+            , stderr=subprocess.PIPE
+            , env=db_conn.get_cmd_env())
+
+        stderr_reader = threading.Thread(target=self.read_stderr)
+        stderr_reader.daemon = True
+        stderr_reader.start()
+
+        if init_sql:
+            self.run(init_sql)
+
+    def read_stderr(self):
+        for line in iter(self.p.stderr.readline, b''):
+            self.stderr_lines.put(line.decode('utf-8', errors='ignore'))
+        self.stderr_lines.put(None)
+
+    def write_stdin(self, script):
+        try:
+            self.p.stdin.write(script.encode('utf-8'))
+            self.p.stdin.flush()
+        except (IOError, OSError):
+            # the ybsql process has ended, its exit code is collected by run()
+            None
+
+    def is_alive(self):
+        return self.p.poll() is None
+
+    def __deepcopy__(self, memo):
+        # a running process can't be copied, a copied DBConnect starts its own session
+        return None
+
+    @staticmethod
+    def heredoc_unescape(sql_statement):
+        """The one off ybsql call passes SQL through an unquoted shell heredoc,
+        this applies the same backslash processing so both paths run the same SQL.
+        """
+        if Common.is_windows:
+            return sql_statement
+        return re.sub(r'\\([\\$`]|\n)'
+            , lambda match: '' if match.group(1) == '\n' else match.group(1)
+            , sql_statement)
+
+    def run(self, sql_statement):
+        """Run SQL in the session.
+
+        :param sql_statement: The SQL command string
+        :return: a CmdResult with the stdout, stderr and exit code of the SQL
+        """
+        return self.run_many([sql_statement])[0]
+
+    def run_many(self, sql_statements):
+        """Run many SQL statements in the session.  All the statements are written
+        to the session at once, then the output of each statement is read up to
+        its marker, so the statements run without a round trip between them.
+
+        A failed statement ends the session, see ON_ERROR_STOP, the statements
+        after it are not run.
+
+        :param sql_statements: list of SQL command strings
+        :return: list of CmdResult, one per statement that was run, in statement
+            order, the last CmdResult holds the failure of a failed statement.
+            Each CmdResult has an end_time set when its output was complete.
+        """
+        script = ''
+        markers = []
+        for sql_statement in sql_statements:
+            self.stmt_ct += 1
+            markers.append('%s%d' % (self.marker_prefix, self.stmt_ct))
+            # the lone ';' completes a final statement that has no trailing semicolon
+            script += '%s\n;\n\\echo %s\n\\! echo %s 1>&2\n' % (
+                self.heredoc_unescape(sql_statement), markers[-1], markers[-1])
+
+            if Common.verbose >= 2:
+                print('%s\n%s' % (
+                    Text.color('--ybsql session statement(%d) Executing--' % self.stmt_ct, style='bold')
+                    , sql_statement))
+            elif Common.verbose >= 1:
+                print('%s: %s'
+                    % (Text.color('Executing in ybsql session', style='bold'), sql_statement))
+
+        # write from a thread so a large statement can't deadlock against a large result
+        writer = threading.Thread(target=self.write_stdin, args=(script,))
+        writer.daemon = True
+        writer.start()
+
+        cmds = []
+        start_time = datetime.now()
+        for sql_statement, marker in zip(sql_statements, markers):
+            found_marker = False
+            stdout_lines = []
+            for line in iter(self.p.stdout.readline, b''):
+                line = line.decode('utf-8', errors='ignore')
+                if line.rstrip('\r\n') == marker:
+                    found_marker = True
+                    break
+                stdout_lines.append(line)
+
+            stderr_lines = []
+            while True:
+                line = self.stderr_lines.get()
+                if line is None or line.rstrip('\r\n') == marker:
+                    break
+                stderr_lines.append(line)
+
+            if not found_marker:
+                writer.join()
+            exit_code = 0 if found_marker else self.close()
+
+            cmd = CmdResult(sql_statement, ''.join(stdout_lines), ''.join(stderr_lines), exit_code)
+            cmd.start_time = start_time
+            cmd.end_time = datetime.now()
+            start_time = cmd.end_time
+            cmds.append(cmd)
+
+            if Profiler.enabled:
+                Profiler.record(cmd, 'ybsql_session', cmd.end_time, bytes_in=len(sql_statement)
+                    , bytes_out=(len(cmd.stdout) + len(cmd.stderr)))
+
+            if Common.verbose >= 2:
+                print('%s: %s\n%s\n%s%s\n%s'
+                    % (
+                        Text.color('--Exit code', style='bold')
+                        , Text.color(str(cmd.exit_code), fg=('red' if cmd.exit_code else 'cyan'))
+                        , Text.color('--Stdout--', style='bold')
+                        , cmd.stdout.rstrip()
+                        , Text.color('--Stderr--', style='bold')
+                        , Text.color(cmd.stderr.rstrip(), fg='red')))
+
+            if not found_marker:
+                break
+
+        writer.join()
+
+        return cmds
+
+    def close(self):
+        """End the ybsql process.
+
+        :return: the exit code of the ybsql process
+        """
+        if self.is_alive():
+            self.write_stdin('\\q\n')
+        try:
+            self.p.stdin.close()
+        except (IOError, OSError):
+            None
+        return self.p.wait()
+
+class CatalogCache:
+    """LRU cache of catalog query results of a DBConnect, so repeated metadata
+    lookups, like table and column names, are only queried once.
+
+    With --catalog_cache_shared the cache is saved in ~/.ybeasycli/catalog_cache,
+    1 file per connection, so the utilities that other utilities run as sub
+    processes, like yb_create_dev_db.py running yb_get_table_names.py, share it.
+    The last process to save the file wins, a lost save only costs a cache miss.
+
+    The cache is cleared when a statement that may change the catalog is run
+    through the connection, and when a probe of the catalog, counts and maximum
+    object ids/xmin, finds a change made by another session.  The first cache hit
+    of a process is always probed, then changes by other sessions are found up to
+    probe_interval seconds late.
+    """
+    ddl_regex = re.compile(r'\b(CREATE|ALTER|DROP|RENAME|TRUNCATE|GRANT|REVOKE)\b', re.IGNORECASE)
+    probe_sql = """SELECT
+    (SELECT COUNT(*) || ':' || MAX(oid)::VARCHAR || ':' || MAX(xmin::VARCHAR::BIGINT)::VARCHAR FROM pg_catalog.pg_class)
+    || '|' || (SELECT COUNT(*) || ':' || MAX(oid)::VARCHAR || ':' || MAX(xmin::VARCHAR::BIGINT)::VARCHAR FROM pg_catalog.pg_namespace)
+    || '|' || (SELECT COUNT(*) || ':' || NVL(MAX(table_id), 0)::VARCHAR FROM sys.table)
+    || '|' || (SELECT COUNT(*) || ':' || NVL(MAX(database_id), 0)::VARCHAR FROM sys.database) AS catalog_version"""
+
+    def __init__(self, db_conn, max_entries=256, probe_interval=5, shared=False):
+        """
+        :param db_conn: the DBConnect object whose queries are cached
+        :param max_entries: the number of query results kept, the least recently
+            used result is evicted first
+        :param probe_interval: seconds between catalog change probes
+        :param shared: the cache is saved to a file shared by the utility processes
+        """
+        self.db_conn = db_conn
+        self.max_entries = max_entries
+        self.probe_interval = probe_interval
+        self.shared = shared
+        self.entries = collections.OrderedDict()
+        self.catalog_version = None
+        self.probe_ts = 0
+        self.loaded = False
+
+    def key(self, sql_statement, options):
+        return (options, re.sub(r'\s+', ' ', sql_statement).strip())
+
+    def cache_file(self):
+        return os.path.join(
+            DBConnect.cache_dir, 'catalog_cache', '%s.json' % self.db_conn.cache_key())
+
+    def load(self):
+        """Load the cache saved by this or another utility process, once per process."""
+        if self.loaded or not self.shared:
+            return
+        self.loaded = True
+
+        try:
+            with open(self.cache_file()) as cache_file:
+                cache = json.load(cache_file)
+        except (IOError, OSError, ValueError, TypeError):
+            return
+
+        # the probe time of another process isn't trusted, the first hit is probed
+        self.catalog_version = cache['catalog_version']
+        for options, sql_statement, stdout, stderr in cache['entries']:
+            self.entries[(options, sql_statement)] = CmdResult(
+                sql_statement, stdout, stderr, 0)
+
+    def save(self):
+        if not self.shared:
+            return
+
+        cache = {
+            'catalog_version': self.catalog_version
+            , 'entries': [[key[0], key[1], cmd.stdout, cmd.stderr]
+                for key, cmd in self.entries.items()] }
+        try:
+            DBConnect.cache_write(self.cache_file(), cache)
+        except (IOError, OSError) as error:
+            # the cache is only an optimization, the utility runs without it
+            if Common.verbose >= 2:
+                Common.error('catalog cache not saved: %s' % error, exit_code=None, color='yellow')
+
+    def get(self, sql_statement, options):
+        """Get a cached query result.
+
+        :return: a new CmdResult copy of the cached result, or None
+        """
+        self.load()
+        if not self.entries:
+            # nothing to reuse, so there is no need to probe for catalog changes
+            return None
+
+        self.probe()
+        key = self.key(sql_statement, options)
+        if key not in self.entries:
+            return None
+
+        cmd = self.entries.pop(key)
+        self.entries[key] = cmd # the most recently used entry is last
+
+        if Common.verbose >= 2:
+            print('%s: %s' % (Text.color('--Using cached catalog query result', style='bold'), sql_statement))
+
+        return CmdResult(cmd.cmd_dtr, cmd.stdout, cmd.stderr, cmd.exit_code)
+
+    def probe_with_query(self, options):
+        """When the catalog version is unknown, it is queried in the same ybsql call as a
+        catalog query run with the default options, the version is the first output line.
+        """
+        return (self.catalog_version is None
+            and options == DBConnect.ybsql_default_options)
+
+    def put(self, sql_statement, options, cmd, catalog_version=None):
+        """Cache a query result.
+
+        :param catalog_version: the catalog version queried with the statement, see
+            probe_with_query
+        """
+        if cmd.exit_code != 0:
+            return
+
+        if catalog_version:
+            self.set_catalog_version(catalog_version)
+        elif self.catalog_version is None:
+            self.probe(force=True)
+            if self.catalog_version is None:
+                return
+
+        self.entries[self.key(sql_statement, options)] = CmdResult(
+            cmd.cmd_dtr, cmd.stdout, cmd.stderr, cmd.exit_code)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.save()
+
+    def invalidate_on_ddl(self, sql_statement):
+        if CatalogCache.ddl_regex.search(sql_statement):
+            self.load()
+            if self.entries or self.catalog_version:
+                self.invalidate()
+
+    def invalidate(self):
+        self.entries.clear()
+        self.catalog_version = None
+        self.save()
+
+    def set_catalog_version(self, catalog_version):
+        if catalog_version is None or catalog_version != self.catalog_version:
+            self.entries.clear()
+        self.catalog_version = catalog_version
+        self.probe_ts = time.time()
+
+    def probe(self, force=False):
+        if not force and (time.time() - self.probe_ts) < self.probe_interval:
+            return
+
+        cmd = self.db_conn.ybsql_query(CatalogCache.probe_sql)
+        self.set_catalog_version(cmd.stdout.strip() if cmd.exit_code == 0 else None)
+        self.save()
+
 class ArgsHandler:
     """This class contains functions used for argument parsing
     """
@@ -469,6 +930,28 @@ class ArgsHandler:
                 , action="store_true"
                 , help= "prompt for password instead of using the "
                     "YBPASSWORD env variable")
+            conn_grp.add_argument(
+                "--ybsql_session", action="store_true"
+                , help="run all queries through 1 persistent ybsql session instead of"
+                    " starting a new ybsql process for each query")
+            conn_grp.add_argument(
+                "--db_driver", choices=['ybsql', 'psycopg2'], default='ybsql'
+                , help="client used to run the utility's row queries, psycopg2 runs them"
+                    " in process and falls back to ybsql if psycopg2 is not installed"
+                    ", defaults to ybsql")
+            conn_grp.add_argument(
+                "--conn_cache_ttl", type=ArgIntRange(0), metavar='SECONDS'
+                , default=DBConnect.conn_cache_ttl_default
+                , help="cache the connection's verified database/user metadata locally and"
+                    " reuse it for SECONDS instead of verifying the login on each run"
+                    ", defaults to 0, no caching")
+            conn_grp.add_argument(
+                "--no_catalog_cache", action="store_true"
+                , help="don't cache repeated catalog queries, like table and column name lookups")
+            conn_grp.add_argument(
+                "--catalog_cache_shared", action="store_true"
+                , help="save the catalog query cache in ~/.ybeasycli/catalog_cache so it is"
+                    " reused by the following utility runs")
             conn_grp.add_argument(
                 "--skip_db_conn", action="store_true", help=argparse.SUPPRESS)
             conn_grp.add_argument(
@@ -500,6 +983,28 @@ class ArgsHandler:
                 , action="store_true"
                 , help= "prompt for password instead of using the "
                     "YBPASSWORD env variable")
+            conn_grp.add_argument(
+                "--%s_ybsql_session" % type, action="store_true"
+                , help="run all %s queries through 1 persistent ybsql session instead of"
+                    " starting a new ybsql process for each query" % type_desc)
+            conn_grp.add_argument(
+                "--%s_db_driver" % type, choices=['ybsql', 'psycopg2'], default='ybsql'
+                , help="client used to run the %s row queries, psycopg2 runs them"
+                    " in process and falls back to ybsql if psycopg2 is not installed"
+                    ", defaults to ybsql" % type_desc)
+            conn_grp.add_argument(
+                "--%s_conn_cache_ttl" % type, type=ArgIntRange(0), metavar='SECONDS'
+                , default=DBConnect.conn_cache_ttl_default
+                , help="cache the %s connection's verified database/user metadata locally and"
+                    " reuse it for SECONDS instead of verifying the login on each run"
+                    ", defaults to 0, no caching" % type_desc)
+            conn_grp.add_argument(
+                "--%s_no_catalog_cache" % type, action="store_true"
+                , help="don't cache repeated %s catalog queries, like table and column name lookups" % type_desc)
+            conn_grp.add_argument(
+                "--%s_catalog_cache_shared" % type, action="store_true"
+                , help="save the %s catalog query cache in ~/.ybeasycli/catalog_cache so it is"
+                    " reused by the following utility runs" % type_desc)
             conn_grp.add_argument(
                 "--%s_skip_db_conn" % type, action="store_true", help=argparse.SUPPRESS)
             conn_grp.add_argument(
@@ -521,6 +1026,10 @@ class ArgsHandler:
             , help="display verbose execution{1 - info, 2 - debug, 3 - extended}")
         self.args_parser.add_argument(
             "--nocolor", action="store_true", help="turn off colored text output")
+        self.args_parser.add_argument(
+            "--profile", nargs='?', const='', metavar='JSON_FILE'
+            , help="profile the timing of every command and query run, on exit print a summary"
+                " to stderr, or when JSON_FILE is given write every timing to the JSON file")
         self.args_parser.add_argument(
             "--version", "-v", action="version", version=Common.version
             , help="display the program version and exit")
@@ -561,6 +1070,11 @@ class ArgsHandler:
 
         args_optional_grp.add_argument(
             "--report_add_ts_column", action="store_true", help=("add first column with current timestamp to the report" ) )
+        args_optional_grp.add_argument("--report_transport"
+            , choices=['select', 'copy'], default='select'
+            , help=("how the formatted and psv report data is fetched, select: a plain query result,"
+                " copy: a streamed COPY in CSV format which is faster for large reports and"
+                " handles column values containing the delimiter or new lines, defaults to select") )
 
     def add_output_args(self):
         self.has_output_args = True
@@ -673,6 +1187,9 @@ class ArgsHandler:
 
             Common.verbose = self.args.verbose
 
+            if self.args.profile is not None and not Profiler.enabled:
+                Profiler.start(self.args.profile)
+
         return self.args
 
     def set_args_to_default(self):
@@ -1032,6 +1549,118 @@ class DBFilterArgs:
 
         return ('TRUE' if filter_clause == '' else filter_clause)
 
+class Profiler:
+    """Collects the timings of every Cmd and query for the --profile report.
+
+    Each record holds the client side costs of one command; spawn: the time to
+    start the process, wall: start to end, parse: the time spent parsing the
+    output, and the bytes sent to and received from the command.  The server
+    side time of a query is found in sys.log_query by the query tag recorded
+    with the query, while profiling the query tags end with the profile run id.
+    """
+    enabled = False
+    json_file = None
+    run_id = None
+    records = collections.OrderedDict()
+    lock = threading.Lock()
+    skip_files = ('yb_common.py', 'yb_async_cmd.py', 'threading.py')
+
+    @staticmethod
+    def start(json_file=None):
+        """Start profiling, the report is written when the utility exits.
+
+        :param json_file: write the records to this JSON file, otherwise a summary
+            table is printed to stderr
+        """
+        Profiler.enabled = True
+        Profiler.json_file = json_file
+        Profiler.run_id = Common.get_uid()
+        atexit.register(Profiler.report)
+
+    @staticmethod
+    def caller():
+        """The utility file, function and line that the command was run for."""
+        for frame in reversed(traceback.extract_stack()):
+            if os.path.basename(frame[0]) not in Profiler.skip_files:
+                return '%s:%s:%d' % (os.path.basename(frame[0]), frame[2], frame[1])
+        return ''
+
+    @staticmethod
+    def record(cmd, kind, end_time, spawn=None, bytes_in=0, bytes_out=0):
+        """Record a completed command.
+
+        :param cmd: the Cmd or CmdResult of the command
+        :param kind: string, the type of command, like; cmd, ybsql_session, psycopg2
+        :param end_time: datetime, when the command completed
+        :param spawn: timedelta, the time taken to start the command process
+        """
+        with Profiler.lock:
+            Profiler.records[cmd.cmd_id] = {
+                'cmd_id': cmd.cmd_id
+                , 'kind': kind
+                , 'caller': Profiler.caller()
+                , 'query_tag': None
+                , 'start': cmd.start_time.isoformat()
+                , 'wall': (end_time - cmd.start_time).total_seconds()
+                , 'spawn': spawn.total_seconds() if spawn else 0.0
+                , 'parse': 0.0
+                , 'bytes_in': bytes_in
+                , 'bytes_out': bytes_out
+                , 'exit_code': cmd.exit_code }
+
+    @staticmethod
+    def set_query_tag(cmd, query_tag):
+        with Profiler.lock:
+            if cmd.cmd_id in Profiler.records:
+                Profiler.records[cmd.cmd_id]['query_tag'] = query_tag
+
+    @staticmethod
+    def add_parse_time(cmd, start_time):
+        """Add the time from start_time until now to the parse time of the command."""
+        with Profiler.lock:
+            if cmd.cmd_id in Profiler.records:
+                Profiler.records[cmd.cmd_id]['parse'] += (datetime.now() - start_time).total_seconds()
+
+    @staticmethod
+    def report():
+        records = list(Profiler.records.values())
+
+        if Profiler.json_file:
+            with open(Profiler.json_file, 'w') as json_file:
+                json.dump({
+                    'util': Common.util_name
+                    , 'run_id': Profiler.run_id
+                    , 'start': Common.start_ts.isoformat()
+                    , 'wall': (datetime.now() - Common.start_ts).total_seconds()
+                    , 'records': records }, json_file, indent=4)
+            return
+
+        callers = collections.OrderedDict()
+        measures = ('wall', 'spawn', 'parse', 'bytes_in', 'bytes_out')
+        for caller in [record['caller'] for record in records] + ['Total']:
+            callers[caller] = dict([('calls', 0)] + [(measure, 0) for measure in measures])
+        for record in records:
+            for caller in (record['caller'], 'Total'):
+                callers[caller]['calls'] += 1
+                for measure in measures:
+                    callers[caller][measure] += record[measure]
+
+        data = []
+        for caller, totals in callers.items():
+            data.append([caller, totals['calls']
+                , '%.3f' % totals['wall'], '%.3f' % totals['spawn'], '%.3f' % totals['parse']
+                , totals['bytes_in'], totals['bytes_out']])
+
+        sys.stderr.write('%s: %s, %s: %s, %s: %.3f\n%s\n' % (
+            Text.color('--Profile run id', style='bold')
+            , Text.color(Profiler.run_id, fg='cyan')
+            , Text.color('Util', style='bold')
+            , Text.color(Common.util_name, fg='cyan')
+            , Text.color('Elapsed seconds', style='bold')
+            , (datetime.now() - Common.start_ts).total_seconds()
+            , tabulate(data, headers=['caller', 'calls', 'wall\nseconds', 'spawn\nseconds'
+                , 'parse\nseconds', 'bytes\nin', 'bytes\nout'])))
+
 class Text:
     colors = {
         'black': 0
@@ -1092,11 +1721,15 @@ class DBConnect:
     env_to_set = conn_args.copy()
     env_to_set['pwd'] = 'YBPASSWORD'
 
+    cache_dir = os.path.join(os.path.expanduser('~'), '.ybeasycli')
+    conn_cache_dir = os.path.join(cache_dir, 'conn_cache')
+    conn_cache_ttl_default = 0
+
     # TODO, revisit when YB 4.X is depricated these warnings seem to only be for YB<=4.X
     ybtool_stderr_strip_warnings = []
 
     def __init__(self, args_handler=None, env=None, conn_type=''
-        , connect_timeout=10, on_fail_exit=True):
+        , connect_timeout=10, on_fail_exit=True, pwd_env=None):
         """Creates a validated database connection object.
         The connection settings can be received as a set of input arguments or
         as environment strings but not both.
@@ -1109,6 +1742,8 @@ class DBConnect:
         connect, defaults to 10 seconds
         :param on_fail_exit: on a failed db connection exit with an error
         , default to True
+        :param pwd_env: name of an environment variable, like; SRC_YBPASSWORD, that
+        when set is used as the password instead of YBPASSWORD
         """
         self.database = None
         self.schema = None
@@ -1116,6 +1751,8 @@ class DBConnect:
         self.on_fail_exit = on_fail_exit
         self.connected = False
         self.env_pre = self.get_env()
+        if pwd_env and os.environ.get(pwd_env):
+            self.env_pre['pwd'] = os.environ.get(pwd_env)
 
         arg_conn_prefix = ('' if (conn_type=='') else ('%s_' % conn_type))
         pwd_required = False
@@ -1124,6 +1761,11 @@ class DBConnect:
         self.env_args = {}
         self.on_manager_node = (find_executable('ybcli') is not None)
         self.set_user_su = False
+        self.ybsql_session = None
+        self.use_ybsql_session = False
+        db_driver = 'ybsql'
+        self.conn_cache_ttl = self.conn_cache_ttl_default
+        self.catalog_cache = CatalogCache(self)
 
         if args_handler:
             for conn_arg in self.conn_args.keys():
@@ -1145,6 +1787,19 @@ class DBConnect:
                 args_handler.args, '%scurrent_schema' % arg_conn_prefix)
             self.set_user_su = getattr(
                 args_handler.args, '%sset_user_su' % arg_conn_prefix)
+            self.use_ybsql_session = getattr(
+                args_handler.args, '%sybsql_session' % arg_conn_prefix, False)
+            if self.use_ybsql_session:
+                atexit.register(self.ybsql_session_close)
+            db_driver = getattr(
+                args_handler.args, '%sdb_driver' % arg_conn_prefix, 'ybsql')
+            if getattr(args_handler.args, '%sno_catalog_cache' % arg_conn_prefix, False):
+                self.catalog_cache = None
+            else:
+                self.catalog_cache.shared = getattr(
+                    args_handler.args, '%scatalog_cache_shared' % arg_conn_prefix, False)
+            self.conn_cache_ttl = getattr(args_handler.args
+                , '%sconn_cache_ttl' % arg_conn_prefix, self.conn_cache_ttl_default)
         elif env:
             self.current_schema = None
             for env_var in env.keys():
@@ -1183,6 +1838,8 @@ class DBConnect:
             else:
                 self.env['pwd'] = '-*-force bad password-*-'
 
+        self.driver = self.get_driver(db_driver)
+
         self.verify()
 
         if self.ybdb['version_major'] <= 4:
@@ -1256,6 +1913,19 @@ class DBConnect:
             env[key] = os.environ.get(env_name)
         return env
 
+    def get_cmd_env(self):
+        """Build a copy of the process environment with the YB* connection
+        variables of this connection set, for use as a subprocess environment.
+        """
+        cmd_env = os.environ.copy()
+        for key, value in self.env.items():
+            env_name = DBConnect.env_to_set[key]
+            if value:
+                cmd_env[env_name] = value
+            elif env_name in cmd_env:
+                del cmd_env[env_name]
+        return cmd_env
+
     @staticmethod
     def create_env(dbuser=None, host=None, port=None, conn_db=None, pwd=None):
         return {
@@ -1265,8 +1935,57 @@ class DBConnect:
             , 'conn_db':conn_db
             , 'pwd':pwd}
 
+    def get_driver(self, db_driver):
+        """Get the driver used to run row queries, see query_rows.
+
+        :param db_driver: 'ybsql' or 'psycopg2'
+        """
+        if db_driver == 'psycopg2':
+            try:
+                return DBDriverPsycopg2(self)
+            except ImportError:
+                Common.error("the psycopg2 module is not installed, falling back to the ybsql db driver"
+                    , exit_code=None, color='yellow')
+        return DBDriverYbsql(self)
+
+    def query_rows(self, sql_statement):
+        """Run a query and return its result as a header list and a list of rows.
+
+        :param sql_statement: The SQL command string
+        :return: A Cmd like result with the additional attributes; columns, a
+            list of column names and rows, a list of row value lists.  The row
+            values are typed for the psycopg2 driver and strings for the ybsql driver.
+        """
+        self.catalog_cache_invalidate_on_ddl(sql_statement)
+        return self.driver.query_rows(sql_statement)
+
+    def catalog_cache_invalidate_on_ddl(self, sql_statement):
+        """Every query path calls this before running SQL that isn't a cached catalog query."""
+        if self.catalog_cache:
+            self.catalog_cache.invalidate_on_ddl(sql_statement)
+
+    def query_tags_sql(self, sql_statement, client='ybsql'):
+        """Prefix SQL with the YbEasyCli query tag and the --current_schema
+        """
+        self.ybsql_call_count += 1
+
+        # while profiling the run id in the query tag links the profile to sys.log_query
+        self.query_tag = 'YbEasyCli:%s:%s(%d)%s' % (
+            Common.util_name, client, self.ybsql_call_count
+            , (':%s' % Profiler.run_id) if Profiler.enabled else '')
+        sql_statement = "SET ybd_query_tags TO '%s';\n%s" % (self.query_tag, sql_statement)
+        if self.current_schema:
+            sql_statement = "SET SCHEMA '%s';\n%s" % (
+                self.current_schema, sql_statement)
+
+        return sql_statement
+
     def verify(self):
-        cmd_results = self.ybsql_query(
+        if self.conn_cache_load():
+            self.verify_report()
+            return
+
+        cmd_results = self.query_rows(
             """SELECT
     CURRENT_DATABASE() AS db
     , CURRENT_SCHEMA AS schema
@@ -1284,8 +2003,8 @@ class DBConnect:
 FROM pg_catalog.pg_roles
 WHERE rolname = CURRENT_USER""")
 
-        db_info = cmd_results.stdout.split('|')
-        if cmd_results.stderr == '' and cmd_results.exit_code == 0:
+        if cmd_results.stderr == '' and cmd_results.exit_code == 0 and len(cmd_results.rows):
+            db_info = cmd_results.rows[0]
             self.database = db_info[0]
             self.schema = db_info[1]
             # if --current_schema arg was set check if it is valid
@@ -1313,13 +2032,17 @@ WHERE rolname = CURRENT_USER""")
                 int(db_info[6]) * 10000
                 + int(db_info[7]) * 100
                 + int(db_info[8]))
-            , 'is_super_user': (True if db_info[9].strip() == 't' else False)
-            , 'has_create_user': (True if db_info[10].strip() == 't' else False)
-            , 'has_create_db': (True if db_info[11].strip() == 't' else False)
+            , 'is_super_user': (db_info[9] in (True, 't'))
+            , 'has_create_user': (db_info[10] in (True, 't'))
+            , 'has_create_db': (db_info[11] in (True, 't'))
             , 'user': db_info[12].strip()
             , 'host': self.env['host']
             , 'database_encoding': db_info[2] }
 
+        self.conn_cache_save()
+        self.verify_report()
+
+    def verify_report(self):
         if Common.verbose >= 1:
             print(
                 '%s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s'
@@ -1346,14 +2069,111 @@ WHERE rolname = CURRENT_USER""")
         if self.set_user_su:
             self.ybdb['is_super_user'] = True
 
+    @staticmethod
+    def cache_makedirs(dir_name):
+        """Create a local cache directory that only the current OS user can read."""
+        if not os.path.isdir(dir_name):
+            os.makedirs(dir_name, 0o700)
+        os.chmod(dir_name, 0o700)
+
+    @staticmethod
+    def cache_write(file_name, data):
+        """Atomically write a json cache file that only the current OS user can read."""
+        DBConnect.cache_makedirs(os.path.dirname(file_name))
+        tmp_file_name = '%s.%d.tmp' % (file_name, os.getpid())
+        fd = os.open(tmp_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as cache_file:
+            json.dump(data, cache_file)
+        # os.replace is an atomic rename that also overwrites on Windows, py2 only has os.rename
+        getattr(os, 'replace', os.rename)(tmp_file_name, file_name)
+
+    @staticmethod
+    def cache_secret():
+        """A random per OS user secret used to key the local cache file names, it is
+        created on first use in a file only the current OS user can read.
+        """
+        secret_file_name = os.path.join(DBConnect.cache_dir, 'cache_secret')
+        try:
+            with open(secret_file_name, 'rb') as secret_file:
+                secret = secret_file.read()
+            if len(secret) >= 32:
+                return secret
+        except (IOError, OSError):
+            None
+
+        DBConnect.cache_makedirs(DBConnect.cache_dir)
+        secret = base64.b64encode(os.urandom(32))
+        fd = os.open(secret_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as secret_file:
+            secret_file.write(secret)
+        return secret
+
+    def cache_key(self):
+        """An HMAC of this connection's host, port, user, database and schema keyed with
+        the per OS user cache secret, the password is never part of the key.
+        """
+        conn_key = json.dumps([self.env.get(key) for key in
+            ('host', 'port', 'dbuser', 'conn_db')] + [self.current_schema])
+        return hmac.new(
+            DBConnect.cache_secret(), conn_key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def conn_cache_file(self):
+        """The cache file of this connection's verify metadata."""
+        return os.path.join(DBConnect.conn_cache_dir, '%s.json' % self.cache_key())
+
+    def conn_cache_load(self):
+        """Set the verify metadata from the local cache.
+
+        :return: True if an unexpired cache entry was found
+        """
+        if self.conn_cache_ttl <= 0:
+            return False
+
+        try:
+            with open(self.conn_cache_file()) as cache_file:
+                cache = json.load(cache_file)
+        except (IOError, OSError, ValueError, TypeError):
+            return False
+
+        if (time.time() - cache['ts']) > self.conn_cache_ttl:
+            return False
+
+        self.database = cache['database']
+        self.schema = cache['schema']
+        self.ybdb = cache['ybdb']
+        self.connected = True
+
+        if Common.verbose >= 2:
+            print('%s: %s' % (Text.color('--Using cached connection metadata', style='bold')
+                , self.conn_cache_file()))
+
+        return True
+
+    def conn_cache_save(self):
+        if self.conn_cache_ttl <= 0:
+            return
+
+        cache = {
+            'ts': time.time()
+            , 'database': self.database
+            , 'schema': self.schema
+            , 'ybdb': self.ybdb }
+        try:
+            DBConnect.cache_write(self.conn_cache_file(), cache)
+        except (IOError, OSError) as error:
+            # the cache is only an optimization, the utility runs without it
+            if Common.verbose >= 2:
+                Common.error('connection cache not saved: %s' % error, exit_code=None, color='yellow')
+
     def exit_if_not_su(self):
         if not self.ybdb['is_super_user']:
             Common.error('this utility must be run by a database super user...')
 
     ybsql_call_count = 0
+    ybsql_default_options = '-A -q -t -v ON_ERROR_STOP=1 -X'
 
     def ybsql_query(self, sql_statement
-        , options = '-A -q -t -v ON_ERROR_STOP=1 -X', stdin = None, strip_warnings=[]):
+        , options = ybsql_default_options, stdin = None, strip_warnings=[], catalog_cache=False):
         """Run and evaluate a query using ybsql.
 
         :param sql_statement: The SQL command string
@@ -1366,17 +2186,145 @@ WHERE rolname = CURRENT_USER""")
                     ON_ERROR_STOP: processing is stopped immediately,
                         with an exit code of 3
                 -X: do not read startup file (~/.ybsqlrc)
+        :param catalog_cache: the query only reads the catalog, its result is
+            cached and reused, see CatalogCache
         :return: The result produced by running the given command
         """
-        self.ybsql_call_count += 1
-        strip_warnings.extend(self.ybtool_stderr_strip_warnings)
+        strip_warnings = strip_warnings + self.ybtool_stderr_strip_warnings
 
-        sql_statement = ("SET ybd_query_tags TO 'YbEasyCli:%s:ybsql(%d)';\n%s"
-            % (Common.util_name, self.ybsql_call_count, sql_statement))
-        if self.current_schema:
-            sql_statement = "SET SCHEMA '%s';\n%s" % (
-                self.current_schema, sql_statement)
+        use_catalog_cache = catalog_cache and self.catalog_cache and stdin is None
+        if use_catalog_cache:
+            cmd = self.catalog_cache.get(sql_statement, options)
+            if cmd:
+                return cmd
+        else:
+            self.catalog_cache_invalidate_on_ddl(sql_statement)
+        catalog_sql_statement = sql_statement
 
+        probe_with_query = use_catalog_cache and self.catalog_cache.probe_with_query(options)
+        if probe_with_query:
+            sql_statement = '%s;\n%s' % (CatalogCache.probe_sql, sql_statement)
+
+        # the query tags SET is run before every statement, so it isn't session state
+        use_ybsql_session = self.can_use_ybsql_session(sql_statement, options, stdin)
+        sql_statement = self.query_tags_sql(sql_statement)
+
+        cmd = None
+        if use_ybsql_session:
+            cmd = self.ybsql_session_query(sql_statement, strip_warnings)
+
+        if not cmd:
+            cmd = self.ybtool_cmd(self.ybsql_cmd_str(sql_statement, options)
+                , stack_level=4, stdin=stdin, strip_warnings=strip_warnings)
+
+        if Profiler.enabled:
+            Profiler.set_query_tag(cmd, self.query_tag)
+
+        if use_catalog_cache:
+            catalog_version = None
+            if probe_with_query and cmd.exit_code == 0:
+                catalog_version, _, cmd.stdout = cmd.stdout.partition('\n')
+            self.catalog_cache.put(catalog_sql_statement, options, cmd, catalog_version)
+
+        return cmd
+
+    def ybsql_query_iter(self, sql_statement
+        , options = ybsql_default_options, strip_warnings=[]):
+        """Run a query using ybsql and stream the output, the query result is not
+        held in memory.  Never uses the ybsql session as the output has to be read
+        before another statement can be run on the session.
+
+        Example:
+            cmd = db_conn.ybsql_query_iter('SELECT * FROM big_table')
+            for line in cmd:
+                sys.stdout.write(line + '\n')
+            cmd.on_error_exit()
+
+        :param sql_statement: The SQL command string
+        :options: ybsql command options, see ybsql_query
+        :return: a streaming Cmd, iterate over it to get the decoded output lines,
+            its stderr and exit_code are set once the iteration completes
+        """
+        strip_warnings = strip_warnings + self.ybtool_stderr_strip_warnings
+
+        self.catalog_cache_invalidate_on_ddl(sql_statement)
+        sql_statement = self.query_tags_sql(sql_statement)
+        query_tag = self.query_tag
+
+        cmd = self.ybtool_cmd(self.ybsql_cmd_str(sql_statement, options)
+            , stack_level=4, strip_warnings=strip_warnings, stream=True)
+        # the profile record is only created once the stream completes
+        cmd.query_tag = query_tag
+
+        return cmd
+
+    def ybsql_query_concurrent(self, sql_statements, concurrency=4
+        , options = ybsql_default_options, strip_warnings=[]):
+        """Run many queries with ybsql, up to concurrency of them at the same time.
+        Each query is a separate ybsql process that gets its own copy of the
+        connection environment, the process environment is not changed.
+
+        Runs on asyncio with Python 3, with Python 2 the queries run one at a time.
+
+        :param sql_statements: list of SQL command strings
+        :param concurrency: number, the maximum number of queries running at once
+        :options: ybsql command options, see ybsql_query
+        :return: list of CmdResult, in the same order as sql_statements
+        """
+        strip_warnings = strip_warnings + self.ybtool_stderr_strip_warnings
+
+        try:
+            import yb_async_cmd
+        except (ImportError, SyntaxError):
+            return [
+                self.ybsql_query(sql_statement, options=options, strip_warnings=strip_warnings)
+                for sql_statement in sql_statements]
+
+        env = self.get_cmd_env()
+        argv = self.ybsql_argv(options)
+        cmds = []
+        for sql_statement in sql_statements:
+            self.catalog_cache_invalidate_on_ddl(sql_statement)
+            sql_statement = self.query_tags_sql(sql_statement)
+            cmd_result = CmdResult(cmd_str=sql_statement)
+            cmds.append({
+                'cmd_id': cmd_result.cmd_id
+                , 'argv': argv
+                # the same backslash processing as the heredoc of the one off ybsql call
+                , 'stdin': YbsqlSession.heredoc_unescape(sql_statement)
+                , 'env': env
+                , 'cmd_result': cmd_result
+                , 'query_tag': self.query_tag })
+
+            if Common.verbose == 1:
+                print('%s: %s'
+                    % (Text.color('Executing concurrently', style='bold'), sql_statement))
+
+        for cmd, (stdout, stderr, exit_code, start_time, end_time) in zip(
+            cmds, yb_async_cmd.run_concurrent(cmds, max(concurrency, 1))):
+            for warning in strip_warnings:
+                stderr = re.sub(warning, '', stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+            cmd['cmd_result'].stdout = stdout
+            cmd['cmd_result'].stderr = stderr
+            cmd['cmd_result'].exit_code = exit_code
+            cmd['cmd_result'].start_time = start_time
+
+            if Profiler.enabled:
+                Profiler.record(cmd['cmd_result'], 'async_cmd', end_time
+                    , bytes_in=len(cmd['stdin']), bytes_out=(len(stdout) + len(stderr)))
+                Profiler.set_query_tag(cmd['cmd_result'], cmd['query_tag'])
+
+        return [cmd['cmd_result'] for cmd in cmds]
+
+    def ybsql_argv(self, options):
+        """The ybsql executable and arguments as a list, for running ybsql without a shell.
+        """
+        return (['ybsql'] + shlex.split(options)
+            + ['%sconnect_timeout=%d' % (
+                ('' if self.on_manager_node else ('host=%s ' % self.env['host']))
+                , self.connect_timeout)])
+
+    def ybsql_cmd_str(self, sql_statement, options):
         # default timeout is 75 seconds changing it to self.connect_timeout
         #   'host=<host>' string is required first to set command line connect_timeout
         #   see https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-CONNSTRING
@@ -1394,13 +2342,149 @@ WHERE rolname = CURRENT_USER""")
 %s
 eof""".format(ybsql_cmd=ybsql_cmd)
 
-        ybsql_cmd = ybsql_cmd % sql_statement
+        return ybsql_cmd % sql_statement
+
+    # statements whose effect outlives the statement, like; the role, the search_path,
+    #   temp tables or an open transaction, would leak into the later session queries
+    session_state_regex = re.compile(
+        r'(^|;)\s*(SET\s+(?!LOCAL\b)|RESET\b|BEGIN\b|START\s+TRANSACTION\b'
+        r'|CREATE\s+((LOCAL|GLOBAL)\s+)?TEMP(ORARY)?\b|DECLARE\b|PREPARE\b|LISTEN\b|DISCARD\b)'
+        , re.IGNORECASE | re.MULTILINE)
+
+    def can_use_ybsql_session(self, sql_statement, options, stdin):
+        """Statements that change ybsql's state, like '\\c' or '\\pset', statements
+        that change the database session's state, like 'SET SESSION AUTHORIZATION',
+        and calls with non default options or stdin are run with a one off ybsql call.
+        """
+        return (self.use_ybsql_session
+            and options == DBConnect.ybsql_default_options
+            and stdin is None
+            and not re.search(r'^\s*\\(?!echo\b)', sql_statement, re.MULTILINE)
+            and not DBConnect.session_state_regex.search(sql_statement))
 
-        cmd = self.ybtool_cmd(ybsql_cmd, stack_level=4, stdin=stdin, strip_warnings=strip_warnings)
+    def ybsql_session_query(self, sql_statement, strip_warnings=[]):
+        """Run SQL through the persistent ybsql session of this connection,
+        the session is (re)started as needed.
+
+        :param sql_statement: The SQL command string
+        :return: a CmdResult with the stdout, stderr and exit code of the SQL,
+            or None if the session could not be started
+        """
+        if (self.ybsql_session is None
+            or not self.ybsql_session.is_alive()
+            or self.ybsql_session.env != self.env):
+            self.ybsql_session_close()
+            try:
+                self.ybsql_session = YbsqlSession(self)
+            except (IOError, OSError) as error:
+                # without a ybsql executable to start, fall back to one off ybsql calls
+                if Common.verbose >= 1:
+                    Common.error('ybsql session not started: %s' % error, exit_code=None, color='yellow')
+                self.use_ybsql_session = False
+                return None
+
+        cmd = self.ybsql_session.run(sql_statement)
+
+        for warning in strip_warnings:
+            cmd.stderr = re.sub(warning, '', cmd.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
 
         return cmd
 
-    def ybtool_cmd(self, cmd, stack_level=3, stdin=None, strip_warnings=[]):
+    def ybsql_batch(self, sql_statements, strip_warnings=[]):
+        """Run a list of independent SQL statements in one ybsql session with a
+        single round trip and return a separate result for each statement.
+
+        The statements are separated in the ybsql output with in-band markers, see
+        YbsqlSession.run_many.  A failed statement ends the session, a new session
+        is started for the statements after it.
+
+        Example:
+            for result in db_conn.ybsql_batch(['SELECT 1 AS a', 'DELETE FROM t1']):
+                print(result['rows'], result['rowcount'], result['error'])
+
+        :param sql_statements: list of SQL command strings, a statement must not
+            change the ybsql output settings, like; \\pset
+        :return: list of dictionaries, one per statement, with the keys:
+            sql: the statement
+            columns: list of column names of a row returning statement, otherwise None
+            rows: list of rows, each a list of column string values, otherwise None
+            rowcount: the number of rows returned or affected, None for statements
+                without a row count, like DDL
+            error: the error message of a failed statement, otherwise None
+            notices: INFO/NOTICE/WARNING messages of a successful statement
+            elapsed: datetime.timedelta, the statement run time
+        """
+        strip_warnings = strip_warnings + self.ybtool_stderr_strip_warnings
+        delimiter = chr(31) # ASCII US(unit separator)
+        for sql_statement in sql_statements:
+            self.catalog_cache_invalidate_on_ddl(sql_statement)
+
+        # the session is not quiet so that DML statements return a command tag
+        #   with their rowcount, like; INSERT 0 5
+        init_sql = """\\pset tuples_only off
+\\pset footer off
+\\pset fieldsep '%s%s'
+%s
+\\set QUIET off""" % (
+            ('\\' if Common.is_windows else '\\\\'), hex(ord(delimiter))[1:]
+            , self.query_tags_sql('', client='ybsql_batch'))
+        query_tag = self.query_tag
+
+        results = []
+        while len(results) < len(sql_statements):
+            try:
+                session = YbsqlSession(self, init_sql)
+            except (IOError, OSError) as error:
+                Common.error('ybsql session not started: %s' % error)
+
+            start_time = datetime.now()
+            for cmd in session.run_many(sql_statements[len(results):]):
+                for warning in strip_warnings:
+                    cmd.stderr = re.sub(warning, '', cmd.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+                parse_start_time = datetime.now()
+                results.append(self.ybsql_batch_result(cmd, delimiter))
+                if Profiler.enabled:
+                    Profiler.add_parse_time(cmd, parse_start_time)
+                    Profiler.set_query_tag(cmd, query_tag)
+                results[-1]['elapsed'] = cmd.end_time - start_time
+                start_time = cmd.end_time
+            session.close()
+
+        return results
+
+    @staticmethod
+    def ybsql_batch_result(cmd, delimiter):
+        result = {
+            'sql': cmd.cmd_dtr
+            , 'columns': None
+            , 'rows': None
+            , 'rowcount': None
+            , 'error': (cmd.stderr.strip() or 'ybsql exit code: %d' % cmd.exit_code) if cmd.exit_code else None
+            , 'notices': '' if cmd.exit_code else cmd.stderr }
+
+        stdout = cmd.stdout.rstrip('\r\n')
+        if cmd.exit_code or stdout == '':
+            return result
+
+        row_count_tag = re.match(r'^(INSERT \d+|UPDATE|DELETE|SELECT|MOVE|FETCH|COPY) (\d+)$', stdout)
+        is_row_query = re.match(r'^(\s*(--[^\n]*)?\n)*\s*(SELECT|WITH|VALUES|SHOW|TABLE|EXPLAIN)\b'
+            , cmd.cmd_dtr, re.IGNORECASE)
+        if row_count_tag:
+            result['rowcount'] = int(row_count_tag.group(2))
+        elif re.match(r'^[A-Z][A-Z ]*$', stdout) and not is_row_query:
+            None # a command tag without a row count, like; CREATE TABLE
+        else:
+            (result['columns'], result['rows']) = Report.del_data_to_list_data(stdout, delimiter)
+            result['rowcount'] = len(result['rows'])
+
+        return result
+
+    def ybsql_session_close(self):
+        if self.ybsql_session:
+            self.ybsql_session.close()
+            self.ybsql_session = None
+
+    def ybtool_cmd(self, cmd, stack_level=3, stdin=None, strip_warnings=[], stream=False):
         # if the first argument in the cmd is a python YbEasyCli tool then prepend the
         #    python executable path(sys.executable) to the cmd. Required for Windows support.
         if re.search(r"^(.*?\.py)", cmd):
@@ -1408,15 +2492,142 @@ eof""".format(ybsql_cmd=ybsql_cmd)
             if Common.is_windows:
                 cmd = '&%s' % cmd
 
-        self.set_env(self.env)
-        cmd = Cmd(cmd, stack_level=stack_level, stdin=stdin)
-        self.set_env(self.env_pre)
-
-        for warning in strip_warnings:
-            cmd.stderr = re.sub(warning, '', cmd.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+        cmd = Cmd(cmd, stack_level=stack_level, stdin=stdin
+            , stream=stream, strip_warnings=strip_warnings, env=self.get_cmd_env())
 
         return cmd
 
+class DBDriverYbsql:
+    name = 'ybsql'
+
+    def __init__(self, db_conn):
+        """Row query driver that runs the query with ybsql and parses its text output.
+
+        :param db_conn: the DBConnect object the driver runs queries for
+        """
+        self.db_conn = db_conn
+
+    def query_rows(self, sql_statement):
+        delimiter = chr(31) # ASCII US(unit separator)
+        escape_str = '\\' if Common.is_windows else '\\\\'
+
+        cmd_results = self.db_conn.ybsql_query("""\\pset tuples_only off
+\\pset footer off
+\\pset fieldsep '%s%s'
+%s""" % (escape_str, hex(ord(delimiter))[1:], sql_statement))
+
+        cmd_results.columns = []
+        cmd_results.rows = []
+        if cmd_results.exit_code == 0 and cmd_results.stdout.strip() != '':
+            parse_start_time = datetime.now()
+            (cmd_results.columns, cmd_results.rows) = Report.del_data_to_list_data(
+                cmd_results.stdout.rstrip('\r\n'), delimiter)
+            if Profiler.enabled:
+                Profiler.add_parse_time(cmd_results, parse_start_time)
+
+        return cmd_results
+
+    def close(self):
+        None
+
+class DBDriverPsycopg2:
+    name = 'psycopg2'
+
+    def __init__(self, db_conn):
+        """Row query driver that runs the query in process over the PostgreSQL wire
+        protocol and returns typed rows.  One database connection is kept open and
+        reused for all queries.
+
+        :param db_conn: the DBConnect object the driver runs queries for
+        :raises ImportError: when the optional psycopg2 module is not installed
+        """
+        import psycopg2
+        self.psycopg2 = psycopg2
+        self.db_conn = db_conn
+        self.conn = None
+        self.conn_env = None
+
+    def connect(self):
+        self.close()
+        env = self.db_conn.env
+        self.conn = self.psycopg2.connect(
+            host=(None if self.db_conn.on_manager_node else env['host'])
+            , port=env['port']
+            , dbname=env['conn_db']
+            , user=env['dbuser']
+            , password=env['pwd']
+            , connect_timeout=self.db_conn.connect_timeout)
+        self.conn.autocommit = True
+        # an unbounded deque keeps all RAISE INFO messages, the default list only keeps 50
+        self.conn.notices = collections.deque()
+        self.conn_env = env.copy()
+        atexit.register(self.close)
+
+    def query_rows(self, sql_statement):
+        sql_statement = self.db_conn.query_tags_sql(sql_statement, client='psycopg2')
+        start_time = datetime.now()
+
+        if Common.verbose >= 2:
+            print('%s\n%s' % (
+                Text.color('--psycopg2 query Executing--', style='bold'), sql_statement))
+        elif Common.verbose >= 1:
+            print('%s: %s' % (Text.color('Executing with psycopg2', style='bold'), sql_statement))
+
+        columns = []
+        rows = []
+        stderr = ''
+        exit_code = 0
+        try:
+            if self.conn is None or self.conn.closed or self.conn_env != self.db_conn.env:
+                self.connect()
+            cursor = self.conn.cursor()
+            cursor.execute(sql_statement)
+            if cursor.description:
+                columns = [desc[0] for desc in cursor.description]
+                rows = [list(row) for row in cursor.fetchall()]
+            cursor.close()
+        except self.psycopg2.OperationalError as error:
+            # mirror the ybsql exit codes, 2 for a connection failure and 3 for a failed statement
+            stderr = str(error)
+            exit_code = 2 if (self.conn is None or self.conn.closed) else 3
+        except self.psycopg2.Error as error:
+            stderr = str(error)
+            exit_code = 3
+
+        if self.conn is not None and not self.conn.closed:
+            notices = ''.join(self.conn.notices)
+            self.conn.notices.clear()
+            stderr = notices + stderr
+
+        for warning in self.db_conn.ybtool_stderr_strip_warnings:
+            stderr = re.sub(warning, '', stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+
+        cmd_results = CmdResult(sql_statement, '', stderr, exit_code)
+        cmd_results.columns = columns
+        cmd_results.rows = rows
+
+        if Profiler.enabled:
+            cmd_results.start_time = start_time
+            Profiler.record(cmd_results, 'psycopg2', datetime.now(), bytes_in=len(sql_statement)
+                , bytes_out=(len(stderr) + sum([len(str(value)) for row in rows for value in row])))
+            Profiler.set_query_tag(cmd_results, self.db_conn.query_tag)
+
+        return cmd_results
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+
+    def __deepcopy__(self, memo):
+        # an open connection can't be copied, the copy opens its own connection
+        driver = DBDriverPsycopg2.__new__(DBDriverPsycopg2)
+        memo[id(self)] = driver
+        driver.psycopg2 = self.psycopg2
+        driver.db_conn = copy.deepcopy(self.db_conn, memo)
+        driver.conn = None
+        driver.conn_env = None
+        return driver
+
 class StoredProc:
     def __init__(self, proc_name, db_conn=None):
         self.db_conn = db_conn
@@ -1608,12 +2819,43 @@ class StoredProc:
     def call_proc_as_anonymous_block(self
         , args={}
         , pre_sql=''
-        , post_sql=''):
+        , post_sql=''
+        , catalog_cache=False):
         """Convert an SQL stored procedure to an anonymous SQL block,
         then execute the anonymous SQL block.  This allows a user to run
         the stored procedure without building the procedure, lowering the
         barrier to run.
 
+        :param args: a dictionary of input args/values to use when calling the stored proc
+        :param pre_sql: SQL to execute before the stored proc
+        :param post_sql: SQL to execute after the stored proc
+        :param catalog_cache: the stored proc only reads the catalog, see DBConnect.ybsql_query
+        """
+        cmd_result = self.db_conn.ybsql_query(self.proc_to_anonymous_block(args, pre_sql, post_sql)
+            , catalog_cache=catalog_cache)
+        return self.process_anonymous_block_result(cmd_result)
+
+    def call_proc_as_anonymous_block_concurrent(self, calls, concurrency=4):
+        """Run many calls of the stored procedure as anonymous blocks, up to
+        concurrency calls at the same time, see DBConnect.ybsql_query_concurrent.
+
+        :param calls: list of dictionaries with the call_proc_as_anonymous_block
+            keyword arguments; args, pre_sql and post_sql
+        :param concurrency: number, the maximum number of calls running at once
+        :return: list of the call results, in the same order as calls
+        """
+        cmd_results = self.db_conn.ybsql_query_concurrent(
+            [self.proc_to_anonymous_block(**call) for call in calls]
+            , concurrency=concurrency)
+        return [self.process_anonymous_block_result(cmd_result) for cmd_result in cmd_results]
+
+    def proc_to_anonymous_block(self
+        , args={}
+        , pre_sql=''
+        , post_sql=''):
+        """Convert an SQL stored procedure to an anonymous SQL block, the block
+        raises the procedure return value as INFO for process_anonymous_block_result.
+
         :param args: a dictionary of input args/values to use when calling the stored proc
         :param pre_sql: SQL to execute before the stored proc
         :param post_sql: SQL to execute after the stored proc
@@ -1642,8 +2884,7 @@ DECLARE
             , return_marker=return_marker, proc_return=self.proc_return
             , proc_after_return=self.proc_after_return )
 
-        cmd_result = self.db_conn.ybsql_query(anonymous_block)
-        return self.process_anonymous_block_result(cmd_result)
+        return anonymous_block
 
     def proc_setof_to_anonymous_block(self
         , args={}
@@ -1723,6 +2964,8 @@ class Report:
             , delimiter=('\\%s' % hex(ord(delimiter))[1:]) )
 
         data = []
+        if len(raw_data) == 1: # header row only, the result has no data rows
+            return (headers, data)
         matches = re.finditer(regex, raw_data[1], re.MULTILINE)
         for matchNum, match in enumerate(matches, start=1):
             data.append(match.groups(0)[0].split(delimiter))
@@ -1771,6 +3014,9 @@ class Report:
 
     def del_data_to_formatted_report(self, del_data, delimiter='|'):
         (headers, data) = Report.del_data_to_list_data(del_data, delimiter)
+        return self.list_data_to_formatted_report(headers, data)
+
+    def list_data_to_formatted_report(self, headers, data):
         (headers, data) = self.list_data_sort(headers, data)
         #(headers, data) = self.list_data_filtered(headers, data)
 
@@ -1779,6 +3025,9 @@ class Report:
 
     def del_data_processed(self, del_data, delimiter='|'):
         (headers, data) = Report.del_data_to_list_data(del_data, delimiter)
+        return self.list_data_processed(headers, data, delimiter)
+
+    def list_data_processed(self, headers, data, delimiter='|'):
         (headers, data) = self.list_data_sort(headers, data)
         #(headers, data) = self.list_data_filtered(headers, data)
 
@@ -1787,6 +3036,41 @@ class Report:
             del_data.append(delimiter.join(row))
         return '\n'.join(del_data)
 
+    @staticmethod
+    def typed_rows_to_list_data(rows):
+        """Convert typed driver rows to the string values ybsql would have output"""
+        str_values = {None: '', True: 't', False: 'f'}
+        data = []
+        for row in rows:
+            data.append([
+                (str_values[value] if (value is None or isinstance(value, bool)) else str(value))
+                for value in row])
+        return data
+
+    def copy_query_to_list_data(self, query):
+        """Fetch the report data with a COPY ... TO STDOUT in CSV format and parse
+        the streamed output with the csv module, unlike the delimited text output
+        the CSV quoting handles values containing the delimiter or new lines.
+
+        A server side COPY is used as the ybsql \\copy meta-command is limited
+        to a single line of SQL.
+        """
+        self.cmd_results = self.db_conn.ybsql_query_iter(
+            "{pre_sql}COPY (\n{query}\n) TO STDOUT WITH (FORMAT CSV, HEADER TRUE)".format(
+                pre_sql=self.pre_sql, query=query)
+            , strip_warnings=self.strip_warnings)
+
+        headers = []
+        data = []
+        for row in csv.reader(self.cmd_results.iter_lines(keepends=True)):
+            if headers:
+                data.append(row)
+            else:
+                headers = row
+        self.cmd_results.on_error_exit()
+
+        return (headers, data)
+
     def build(self, is_source_cstore=False):
         args = self.args_handler.args
 
@@ -1812,6 +3096,7 @@ FROM report_data {order_by}""".format(
             escape_str = '\\' if Common.is_windows else '\\\\'
             fieldsep_clause = "'%s%s'" % (escape_str, hex(ord(delimiter))[1:])
 
+            report_query = query
             query = """
 \pset tuples_only off
 \pset footer off
@@ -1821,13 +3106,27 @@ FROM report_data {order_by}""".format(
                 , pre_sql=self.pre_sql
                 , query=query)
 
-            self.cmd_results = self.db_conn.ybsql_query(query, strip_warnings=self.strip_warnings)
-            self.cmd_results.on_error_exit()
+            if getattr(args, 'report_transport', 'select') == 'copy':
+                (headers, data) = self.copy_query_to_list_data(report_query)
+            elif (self.db_conn.driver.name != 'ybsql'
+                and not re.search(r'^\s*\\', self.pre_sql + report_query, re.MULTILINE)):
+                # the report SQL has no ybsql meta-commands so the row query driver can run it
+                self.cmd_results = self.db_conn.query_rows(self.pre_sql + report_query)
+                self.cmd_results.on_error_exit()
+                headers = self.cmd_results.columns
+                data = Report.typed_rows_to_list_data(self.cmd_results.rows)
+            else:
+                self.cmd_results = self.db_conn.ybsql_query(query, strip_warnings=self.strip_warnings)
+                self.cmd_results.on_error_exit()
+                parse_start_time = datetime.now()
+                (headers, data) = Report.del_data_to_list_data(self.cmd_results.stdout, delimiter)
+                if Profiler.enabled:
+                    Profiler.add_parse_time(self.cmd_results, parse_start_time)
 
             if args.report_type == 'formatted':
-                report = self.del_data_to_formatted_report(self.cmd_results.stdout, delimiter)
+                report = self.list_data_to_formatted_report(headers, data)
             elif args.report_type == 'psv':
-                report = self.del_data_processed(self.cmd_results.stdout, delimiter)
+                report = self.list_data_processed(headers, data, delimiter)
 
         elif args.report_type in ('ctas', 'insert'):
             #case 2 store report from cstore table
@@ -1927,8 +3226,8 @@ class Util(object):
         if hasattr(self.args_handler, 'db_filter_args'):
             self.db_filter_args = self.args_handler.db_filter_args
 
-    def exec_query_and_apply_template(self, sql_query, exec_output=False):
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
+    def exec_query_and_apply_template(self, sql_query, exec_output=False, catalog_cache=False):
+        self.cmd_result = self.db_conn.ybsql_query(sql_query, catalog_cache=catalog_cache)
         self.cmd_result.on_error_exit()
         return self.apply_template(self.cmd_result.stdout, exec_output)
 
@@ -2034,7 +3333,7 @@ WHERE
 ORDER BY
     name""".format(filter_clause = filter_clause)
 
-        cmd_result = self.db_conn.ybsql_query(sql_query)
+        cmd_result = self.db_conn.ybsql_query(sql_query, catalog_cache=True)
         cmd_result.on_error_exit()
 
         dbs = cmd_result.stdout.strip()
@@ -2049,8 +3348,6 @@ ORDER BY
 
     def get_cluster_info(self, return_format='dict'):
         sql_query = """
-\pset tuples_only off
-\pset footer off
 WITH
 wrkr AS (
     SELECT
@@ -2097,9 +3394,9 @@ wrkr AS (
 )
 SELECT * FROM clstr
 """
-        cmd_result = self.db_conn.ybsql_query(sql_query)
+        cmd_result = self.db_conn.query_rows(sql_query)
         cmd_result.on_error_exit()
-        (headers, data) = Report.del_data_to_list_data(cmd_result.stdout.strip())
+        (headers, data) = (cmd_result.columns, cmd_result.rows)
 
         if return_format == 'sql':
             cluster_info = '    SELECT'
@@ -2180,24 +3477,8 @@ class UtilDualDBConn(Util):
             self.args_handler.args_process()
 
     def set_db_connections(self):
-        pwd = os.environ['YBPASSWORD'] if 'YBPASSWORD' in os.environ else None
-        src_pwd = os.environ['SRC_YBPASSWORD'] if 'SRC_YBPASSWORD' in os.environ else None
-        if src_pwd:
-            os.environ['YBPASSWORD'] = src_pwd
-        self.src_conn = DBConnect(args_handler=self.args_handler, conn_type='src')
-        if pwd:
-            os.environ['YBPASSWORD'] = pwd
-        elif src_pwd:
-            del os.environ['YBPASSWORD']
-
-        dst_pwd = os.environ['DST_YBPASSWORD'] if 'DST_YBPASSWORD' in os.environ else None
-        if dst_pwd:
-            os.environ['YBPASSWORD'] = dst_pwd
-        self.dst_conn = DBConnect(args_handler=self.args_handler, conn_type='dst')
-        if pwd:
-            os.environ['YBPASSWORD'] = pwd
-        elif dst_pwd:
-            del os.environ['YBPASSWORD']
+        self.src_conn = DBConnect(args_handler=self.args_handler, conn_type='src', pwd_env='SRC_YBPASSWORD')
+        self.dst_conn = DBConnect(args_handler=self.args_handler, conn_type='dst', pwd_env='DST_YBPASSWORD')
 
     def add_args(self):
         self.args_handler.args_process_init()
@@ -75,9 +75,7 @@ SELECT create_log_query_history_p(
                 , Text.color(su_env['dbuser'], fg='cyan')))
         su_env['pwd'] = getpass.getpass(prompt)
 
-        DBConnect.set_env(su_env)
         self.su_db_conn = DBConnect(env=su_env, conn_type='su')
-        DBConnect.set_env(self.db_conn.env_pre)
 
         if not self.su_db_conn.ybdb['is_super_user']:
             Common.error("dbuser '%s' is not a super user..." % su_env['dbuser'])
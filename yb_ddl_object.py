@@ -129,7 +129,7 @@ ORDER BY LOWER(schema), LOWER(stored_proc)
     def execute(self):
         self.args_handler.args.database = self.db_conn.database
         describe_sql = self.get_describe_sql()
-        output = self.exec_query_and_apply_template(describe_sql)
+        output = self.exec_query_and_apply_template(describe_sql, catalog_cache=True)
 
         if output != '':
             output = self.ddl_modifications(
@@ -36,7 +36,8 @@ class find_columns(Util):
 
         self.cmd_results = StoredProc('yb_find_columns_p', self.db_conn).call_proc_as_anonymous_block(
                 args = {
-                    'a_column_filter_clause' : self.db_filter_sql() } )
+                    'a_column_filter_clause' : self.db_filter_sql() }
+                , catalog_cache=True )
 
         rows_as_dict_str = ''
         self.col_ct = 0
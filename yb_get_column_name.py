@@ -60,7 +60,7 @@ WHERE
 ORDER BY 1""".format(
              filter_clause = self.db_filter_sql() )
 
-        self.cmd_results = self.db_conn.ybsql_query(sql_query)
+        self.cmd_results = self.db_conn.ybsql_query(sql_query, catalog_cache=True)
 
 
 def main():
@@ -71,7 +71,7 @@ obj AS (
 SELECT data FROM data ORDER BY ordinal;\n""".format(
                 filter_clause = self.db_filter_sql() )
 
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
+        self.cmd_result = self.db_conn.ybsql_query(sql_query, catalog_cache=True)
         self.cmd_result.on_error_exit()
 
         data = ''
@@ -80,7 +80,7 @@ SELECT data FROM data ORDER BY ordinal;\n""".format(
             data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
             ordinal += 1
 
-        return self.exec_query_and_apply_template(sql_query, exec_output=self.args_handler.args.exec_output)
+        return self.exec_query_and_apply_template(sql_query, exec_output=self.args_handler.args.exec_output, catalog_cache=True)
 
 def main():
     gcns = get_column_names()
@@ -49,7 +49,7 @@ WHERE
     AND {filter_clause}""".format(
              filter_clause = self.db_filter_sql() )
 
-        self.cmd_results = self.db_conn.ybsql_query(sql_query)
+        self.cmd_results = self.db_conn.ybsql_query(sql_query, catalog_cache=True)
 
 def main():
     gtn = get_table_name()
@@ -68,7 +68,7 @@ data as (
 SELECT data FROM data ORDER BY ordinal;\n""".format(
                 filter_clause = self.db_filter_sql() )
 
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
+        self.cmd_result = self.db_conn.ybsql_query(sql_query, catalog_cache=True)
         self.cmd_result.on_error_exit()
 
         data = ''
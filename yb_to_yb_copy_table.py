@@ -14,15 +14,299 @@ Output:
       Tables that have been copied.
 """
 
+import collections
+import copy
+import csv
+import gzip
+import hashlib
+import json
 import sys
 import os
 import re
 import random
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from tabulate import tabulate
+try:
+    import queue                  # for python3
+except:
+    import Queue as queue         # for python2
 
-from yb_common import ArgIntRange, ArgsHandler, Cmd, Common, DBConnect, DBFilterArgs, Text, Util
+from yb_common import ArgIntRange, ArgsHandler, Cmd, CmdResult, Common, DBConnect, DBFilterArgs, Text, Util
 from yb_chunk_dml_by_integer import chunk_dml_by_integer
 
+class ArgThreads(ArgIntRange):
+    """Custom argparse type for --threads, a bounded int or 'auto'
+    """
+    def __call__(self, arg):
+        if arg == 'auto':
+            return arg
+        return ArgIntRange.__call__(self, arg)
+
+class AdaptivePool:
+    """Pool size of --threads auto, the pool starts small and grows 1 pipeline at
+    a time while the rows/s of the completed units improves.  When the throughput
+    plateaus the pool returns to the best size found, when a unit fails the pool
+    is halved.  Once the pool has stopped growing its size only shrinks.
+    """
+    def __init__(self, max_size, start_size=2, min_gain=0.1):
+        """
+        :param max_size: the largest pool size
+        :param start_size: the first pool size
+        :param min_gain: the fraction the rows/s must improve by to keep growing
+        """
+        self.max_size = max_size
+        self.size = min(start_size, max_size)
+        self.min_gain = min_gain
+        self.best_size = None
+        self.best_rows_per_sec = 0
+        self.growing = True
+        self.window_start()
+
+    def window_start(self):
+        """A measurement window lasts until as many units as the pool size have completed."""
+        self.window_start_time = datetime.now()
+        self.window_rows = 0
+        self.window_units = 0
+
+    def resize(self, size, reason):
+        print('-- threads auto: %d -> %d pipelines, %s' % (self.size, size, reason))
+        self.size = size
+
+    def unit_loaded(self, rows):
+        self.window_rows += rows or 0
+        self.window_units += 1
+        if self.window_units < self.size:
+            return
+
+        seconds = max((datetime.now() - self.window_start_time).total_seconds(), 0.001)
+        rows_per_sec = self.window_rows / seconds
+        if self.growing:
+            if rows_per_sec > self.best_rows_per_sec * (1 + self.min_gain):
+                self.best_size = self.size
+                self.best_rows_per_sec = rows_per_sec
+                if self.size < self.max_size:
+                    self.resize(self.size + 1, '%d rows/s' % rows_per_sec)
+                else:
+                    self.growing = False
+            else:
+                self.growing = False
+                if self.best_size and self.best_size < self.size:
+                    self.resize(self.best_size, '%d rows/s, throughput plateau at %d rows/s'
+                        % (rows_per_sec, self.best_rows_per_sec))
+        self.window_start()
+
+    def unit_failed(self):
+        self.growing = False
+        self.resize(max(1, self.size // 2), 'backing off after a failed unit')
+        self.window_start()
+
+class CopyProgress:
+    """Tail the ybunload and ybload log files of the running copy units to report
+    the rows and bytes copied, the throughput and an ETA while a copy runs.
+    """
+    rows_regex = re.compile(r'([\d,]+)\s+(?:good\s+)?rows', re.IGNORECASE)
+    bytes_regex = re.compile(r'([\d.]+)\s*([KMGT]?i?B)\b(?!/s)')
+    read_rate_regex = re.compile(r'READ:\s*([\d.]+)\s*([KMGT]?i?B)/s')
+    duration_regex = re.compile(r'in\s+(\d+):(\d{2}):(\d{2})')
+    byte_multipliers = {'B': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+    stats_columns = ['table', 'chunk', 'thread', 'status', 'rows', 'bytes'
+        , 'start_time', 'end_time', 'elapsed_seconds', 'rows_per_second', 'bytes_per_second']
+
+    def __init__(self, units, pool_size, log_file_name, interval=None):
+        """
+        :param units: list of copy units, the unit 'progress' is updated as the
+            logs are read
+        :param pool_size: the number of units copied at the same time
+        :param log_file_name: function returning the log file name of a unit and log type
+        :param interval: seconds between progress reports, None for no reports
+        """
+        self.units = units
+        self.pool_size = pool_size
+        self.log_file_name = log_file_name
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.start_time = datetime.now()
+
+    def start(self):
+        if self.interval:
+            self.thread = threading.Thread(target=self.monitor)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join()
+            self.print_progress()
+
+    def monitor(self):
+        while not self.stop_event.wait(self.interval):
+            for unit in self.units:
+                if unit['status'] == 'running':
+                    self.tail_logs(unit)
+            self.print_progress()
+
+    def unit_completed(self, unit):
+        """Read the remaining log lines of a completed unit, for a loaded unit
+        the SUCCESSFUL BULK LOAD line sets the final rows and bytes.
+        """
+        self.tail_logs(unit)
+
+    def tail_logs(self, unit):
+        with self.lock:
+            progress = unit.setdefault('progress', {})
+            for log_type in ('ybunload', 'ybload'):
+                log = progress.setdefault(log_type, {'offset': 0, 'rows': None, 'bytes': None})
+                try:
+                    with open(self.log_file_name(unit, log_type), 'r') as log_file:
+                        log_file.seek(log['offset'])
+                        lines = log_file.read()
+                        # only complete lines are parsed, a partial line is read again
+                        lines = lines[:lines.rfind('\n') + 1]
+                        log['offset'] += len(lines)
+                except (IOError, OSError):
+                    continue
+                for line in lines.splitlines():
+                    (rows, bytes) = self.parse_log_line(line)
+                    if rows is not None:
+                        log['rows'] = rows
+                    if bytes is not None:
+                        log['bytes'] = bytes
+
+            # the rows and bytes loaded by ybload, what ybunload has sent when ybload has not reported yet
+            for key in ('rows', 'bytes'):
+                unit['progress'][key] = (
+                    progress['ybload'][key]
+                    if progress['ybload'][key] is not None
+                    else progress['ybunload'][key])
+
+    def parse_log_line(self, line):
+        """Get the row and byte counts from a ybunload/ybload log line.
+
+        :return: tuple of rows and bytes, None for a count not in the line
+        """
+        rows = self.rows_regex.search(line)
+        rows = int(rows.group(1).replace(',', '')) if rows else None
+
+        bytes = None
+        read_rate = self.read_rate_regex.search(line)
+        duration = self.duration_regex.search(line)
+        if read_rate and duration:
+            # the SUCCESSFUL BULK LOAD line only has the READ rate and the load duration
+            seconds = (int(duration.group(1)) * 3600
+                + int(duration.group(2)) * 60 + int(duration.group(3)))
+            bytes = int(self.to_bytes(read_rate.group(1), read_rate.group(2)) * seconds)
+        else:
+            amount = self.bytes_regex.search(line)
+            if amount and rows is not None:
+                bytes = int(self.to_bytes(amount.group(1), amount.group(2)))
+
+        return (rows, bytes)
+
+    def to_bytes(self, amount, unit):
+        return float(amount) * self.byte_multipliers[unit[0] if unit[0] in 'KMGT' else 'B']
+
+    @staticmethod
+    def format_bytes(bytes):
+        for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+            if bytes < 1024 or unit == 'TB':
+                break
+            bytes /= 1024.0
+        return ('%d%s' if unit == 'B' else '%.1f%s') % (bytes, unit)
+
+    @staticmethod
+    def format_duration(seconds):
+        return str(timedelta(seconds=int(seconds)))
+
+    def unit_seconds(self, unit, now):
+        if not unit.get('start_time'):
+            return 0
+        return ((unit.get('end_time') or now) - unit['start_time']).total_seconds()
+
+    def totals(self, units, now):
+        rows = sum((unit.get('progress', {}).get('rows') or 0) for unit in units)
+        bytes = sum((unit.get('progress', {}).get('bytes') or 0) for unit in units)
+        seconds = sum(self.unit_seconds(unit, now) for unit in units)
+        return (rows, bytes, seconds)
+
+    def eta_seconds(self, rows, now):
+        """The ETA is based on the chunk sizes when every unit has an expected row count,
+        otherwise it is based on the average duration of the completed units.
+        """
+        # units loaded by a previous --resume run are not part of this run
+        units = [unit for unit in self.units if unit['status'] != 'loaded' or unit.get('start_time')]
+        remaining = [unit for unit in units if unit['status'] in ('pending', 'running')]
+        if not remaining:
+            return 0
+        elapsed = max((now - self.start_time).total_seconds(), 1)
+        if rows and all(unit.get('expected_rows') is not None for unit in units):
+            expected_rows = sum(unit['expected_rows'] for unit in units)
+            return max(expected_rows - rows, 0) / (rows / elapsed)
+        completed = [unit for unit in units if unit.get('end_time')]
+        if completed:
+            unit_seconds = sum(self.unit_seconds(unit, now) for unit in completed) / len(completed)
+            return len(remaining) * unit_seconds / self.pool_size
+        return None
+
+    def print_progress(self):
+        now = datetime.now()
+        with self.lock:
+            (rows, bytes, seconds) = self.totals(self.units, now)
+            elapsed = max((now - self.start_time).total_seconds(), 1)
+            eta = self.eta_seconds(rows, now)
+            status_counts = collections.Counter(unit['status'] for unit in self.units)
+            print('-- progress %s: %s rows %s, %d rows/s %s/s, units running: %d, loaded: %d of %d, ETA: %s' % (
+                self.format_duration(elapsed), format(rows, ','), self.format_bytes(bytes)
+                , rows / elapsed, self.format_bytes(bytes / elapsed)
+                , status_counts['running'], status_counts['loaded'], len(self.units)
+                , ('unknown' if eta is None else self.format_duration(eta))))
+
+            threads = sorted(set(unit['thread'] for unit in self.units))
+            if len(threads) > 1:
+                for thread in threads:
+                    (rows, bytes, seconds) = self.totals(
+                        [unit for unit in self.units if unit['thread'] == thread], now)
+                    print('--     thread %d: %s rows %s in %s, %d rows/s' % (
+                        thread, format(rows, ','), self.format_bytes(bytes)
+                        , self.format_duration(seconds), (rows / seconds if seconds else 0)))
+            sys.stdout.flush()
+
+    def unit_stats(self, unit):
+        seconds = self.unit_seconds(unit, unit.get('end_time') or datetime.now())
+        progress = unit.get('progress', {})
+        rows = unit.get('rows') if unit.get('rows') is not None else progress.get('rows')
+        bytes = progress.get('bytes')
+        return {
+            'table': unit['table']['src_table']
+            , 'chunk': unit['chunk']
+            , 'thread': unit['thread']
+            , 'status': unit['status']
+            , 'rows': rows
+            , 'bytes': bytes
+            , 'start_time': (str(unit['start_time']) if unit.get('start_time') else None)
+            , 'end_time': (str(unit['end_time']) if unit.get('end_time') else None)
+            , 'elapsed_seconds': round(seconds, 3)
+            , 'rows_per_second': (round(rows / seconds, 1) if rows and seconds else None)
+            , 'bytes_per_second': (round(bytes / seconds, 1) if bytes and seconds else None) }
+
+    def write_stats(self, stats_file_name):
+        """Write the per unit stats, as JSON for a .json file otherwise as CSV."""
+        stats = [self.unit_stats(unit) for unit in self.units]
+        with open(stats_file_name, 'w') as stats_file:
+            if stats_file_name.lower().endswith('.json'):
+                json.dump({
+                    'elapsed_seconds': round((datetime.now() - self.start_time).total_seconds(), 3)
+                    , 'rows': sum((stat['rows'] or 0) for stat in stats)
+                    , 'bytes': sum((stat['bytes'] or 0) for stat in stats)
+                    , 'units': stats }, stats_file, indent=4)
+            else:
+                writer = csv.DictWriter(stats_file, fieldnames=self.stats_columns)
+                writer.writeheader()
+                writer.writerows(stats)
+
 class yb_to_yb_copy_table(Util):
     """Issue the command used to list the table names found in a particular
     database.
@@ -32,6 +316,8 @@ class yb_to_yb_copy_table(Util):
             'Copy a table from a source cluster to a destination cluster.'
             '\n'
             '\nnote:'
+            '\n  Use the table filter arguments instead of --src_table/--dst_table to copy all the matching tables,'
+            '\n    the largest tables are copied first.'
             '\n  If the src and dst user password differ use SRC_YBPASSWORD and DST_YBPASSWORD env variables.'
             '\n  For manual password entry unset all env passwords or use the --src_W and --dst_W options.')
         , 'positional_args_usage': None
@@ -43,7 +329,8 @@ class yb_to_yb_copy_table(Util):
 --src_conn_db stores_prod
 --dst_host yb89
 --dst_dbuser dze
---dst_conn_db stores_dev"""} ] } }
+--dst_conn_db stores_dev"""} ] }
+        , 'db_filter_args': {'schema':'s.name', 'table':'t.name'} }
 
     def init(self, src_conn=None, dst_conn=None, args_handler=None):
         """Initialize yb_to_yb_copy_tables class.
@@ -70,14 +357,22 @@ class yb_to_yb_copy_table(Util):
         self.args_handler.args_add_connection_group('dst', 'destination')
         self.args_handler.args_usage_example()
 
-        copy_table_r_grp = self.args_handler.args_parser.add_argument_group('required copy table arguments')
-        copy_table_r_grp.add_argument(
-            "--src_table", required=True
+        copy_table_s_grp = self.args_handler.args_parser.add_argument_group('single table copy arguments')
+        copy_table_s_grp.add_argument(
+            "--src_table"
             , help=("source table to copy"))
-        copy_table_r_grp.add_argument(
-            "--dst_table", required=True
+        copy_table_s_grp.add_argument(
+            "--dst_table"
             , help=("destination table"))
 
+        copy_table_m_grp = self.args_handler.args_parser.add_argument_group('multi-table copy arguments')
+        copy_table_m_grp.add_argument(
+            "--dst_schema"
+            , help=("destination schema of the tables matching the table filters,"
+                " defaults to the source table schema"))
+
+        self.db_filter_args = DBFilterArgs([], [], ['schema', 'table'], self.args_handler)
+
         copy_table_o_grp = self.args_handler.args_parser.add_argument_group('optional copy table arguments')
         copy_table_o_grp.add_argument(
             "--log_prefix", help=("prefix placed on log files"))
@@ -93,67 +388,181 @@ class yb_to_yb_copy_table(Util):
         copy_table_o_grp.add_argument(
             "--unload_where_clause", dest='where_clause'
             , help=("SQL clause which filters the rows to copy from the source table"))
+        copy_table_o_grp.add_argument(
+            "--incremental_column", metavar='COLUMN'
+            , help=("copy only the rows of an append only table with a COLUMN value greater than the"
+                " MAX(COLUMN) of the destination table, or the watermark of the last copy when the"
+                " destination is empty, and up to the MAX(COLUMN) of the source table when the copy"
+                " starts, the new watermark is saved in --incremental_state_file"))
+        copy_table_o_grp.add_argument(
+            "--incremental_state_file", metavar='STATE_FILE'
+            , help="file of the --incremental_column watermarks, defaults to %s" % '~/.ybeasycli/incremental_state.json')
         copy_table_o_grp.add_argument("--create_dst_table", action="store_true"
             , help="create destination table from source table ddl before copying table")
         copy_table_o_grp.add_argument(
             "--chunk_rows", dest="chunk_rows", metavar='ROWS'
             , type=ArgIntRange(1,9223372036854775807)
             , help="when set data copying will be performed in chunks of rows rather than one big copy")
+        copy_table_o_grp.add_argument(
+            "--save_chunk_plan", metavar='PLAN_FILE'
+            , help="save the --chunk_rows chunks of the source table to a plan file, for reuse with --chunk_plan")
+        copy_table_o_grp.add_argument(
+            "--chunk_plan", metavar='PLAN_FILE'
+            , help=("copy in the chunks of a plan saved with --save_chunk_plan instead of scanning the"
+                " source table for the --chunk_rows chunks"))
         copy_table_o_grp.add_argument(
             "--threads"
-            , type=ArgIntRange(1,20), default=1
-            , help="when set data copying will be performed in parallel ybunload/ybload threads")
+            , type=ArgThreads(1,20), default=1
+            , help=("when set data copying will be performed in parallel ybunload/ybload threads,"
+                " 'auto' splits each chunk into --auto_threads_max threads and adjusts the number"
+                " of running pipelines to the measured throughput"))
+        copy_table_o_grp.add_argument(
+            "--thread_partition", choices=['modulo', 'range'], default='modulo'
+            , help=("how the rows of a chunk are split between threads, 'modulo' selects rowunique %% THREADS = THREAD"
+                " which has every thread scan the whole chunk, 'range' gives each thread a contiguous"
+                " rowunique sub-range of the chunk so the scans can skip the shards of the other threads,"
+                " defaults to 'modulo'"))
+        copy_table_o_grp.add_argument(
+            "--auto_threads_max"
+            , type=ArgIntRange(2,20), default=8
+            , help="the maximum number of threads used by '--threads auto', defaults to 8")
+        copy_table_o_grp.add_argument(
+            "--pipelines"
+            , type=ArgIntRange(1,20)
+            , help=("maximum number of ybunload/ybload pipelines running at the same time"
+                " across all tables, chunks and threads, defaults to --threads"))
+        copy_table_o_grp.add_argument(
+            "--manifest", metavar='MANIFEST_FILE'
+            , help=("file where the chunks and the state of each chunk/thread copy are recorded,"
+                " defaults to a manifest.json file named like the log files"))
+        copy_table_o_grp.add_argument(
+            "--resume", metavar='MANIFEST_FILE'
+            , help=("resume a failed copy from its manifest file, only the chunk/thread copies"
+                " that were not loaded are run again"))
+        copy_table_o_grp.add_argument(
+            "--progress", metavar='SECONDS'
+            , type=ArgIntRange(1,86400)
+            , help="print the rows and bytes copied, the throughput and an ETA every SECONDS seconds")
+        copy_table_o_grp.add_argument(
+            "--stats_file", metavar='STATS_FILE'
+            , help=("write the rows, bytes and duration of each chunk/thread copy to STATS_FILE"
+                " when the copy completes, as JSON for a .json file otherwise as CSV"))
+        copy_table_o_grp.add_argument(
+            "--stage_mode", choices=['unload', 'load']
+            , help=("copy through gzip compressed shard files in --stage_dir instead of a ybunload|ybload pipe,"
+                " 'unload' only connects to the source and writes the shards and a manifest.json with"
+                " the rows and sha256 of each shard, 'load' only connects to the destination and"
+                " loads the shards listed in the manifest.json, the load can run later, on another"
+                " host or once per destination cluster"))
+        copy_table_o_grp.add_argument(
+            "--stage_dir", metavar='DIR'
+            , help="directory of the --stage_mode shard files and manifest.json")
+        copy_table_o_grp.add_argument("--verify", action="store_true"
+            , help=("after the copy compare the source row count of each chunk/thread with the rows loaded,"
+                " and the row count and an order independent row hash of each table on the source and"
+                " the rows copied to the destination, only the chunks and tables that differ are reported,"
+                " the destination rows matching the copy are counted and hashed before the copy starts"))
+        copy_table_o_grp.add_argument("--verify_recopy", action="store_true"
+            , help=("when --verify finds a table that differs, delete the copied rows from the destination"
+                " table and copy the table again, only used when the destination tables have no rows"
+                " matching the copy before the copy starts"))
+        copy_table_o_grp.add_argument(
+            "--verify_concurrency"
+            , type=ArgIntRange(1,64), default=4
+            , help="the number of --verify queries run at the same time, defaults to 4")
+        copy_table_o_grp.add_argument(
+            "--throughput_history", metavar='HISTORY_FILE'
+            , help=("file where the throughput of each completed copy is recorded, used to project the"
+                " --dry_run duration, defaults to %s" % '~/.ybeasycli/copy_throughput_history.json'))
         copy_table_o_grp.add_argument("--dry_run", action="store_true"
-            , help="prints all the ybunload/ybload commands without running the commands, defaults to FALSE")
+            , help=("prints a plan with the estimated rows, bytes and duration of each table and chunk,"
+                " followed by all the ybunload/ybload commands without running the commands, defaults to FALSE"))
 
     def set_db_connections(self):
-        pwd = os.environ['YBPASSWORD'] if 'YBPASSWORD' in os.environ else None
-        src_pwd = os.environ['SRC_YBPASSWORD'] if 'SRC_YBPASSWORD' in os.environ else None
-        if src_pwd:
-            os.environ['YBPASSWORD'] = src_pwd
-        self.src_conn = DBConnect(args_handler=self.args_handler, conn_type='src')
-        if pwd:
-            os.environ['YBPASSWORD'] = pwd
-        elif src_pwd:
-            del os.environ['YBPASSWORD']
-
-        dst_pwd = os.environ['DST_YBPASSWORD'] if 'DST_YBPASSWORD' in os.environ else None
-        if dst_pwd:
-            os.environ['YBPASSWORD'] = dst_pwd
-        self.dst_conn = DBConnect(args_handler=self.args_handler, conn_type='dst')
-        if pwd:
-            os.environ['YBPASSWORD'] = pwd
-        elif dst_pwd:
-            del os.environ['YBPASSWORD']
+        # a staged unload only uses the source cluster and a staged load only the destination
+        self.stage_mode = self.args_handler.args.stage_mode
+        self.src_conn = (None if self.stage_mode == 'load'
+            else DBConnect(args_handler=self.args_handler, conn_type='src', pwd_env='SRC_YBPASSWORD'))
+        self.dst_conn = (None if self.stage_mode == 'unload'
+            else DBConnect(args_handler=self.args_handler, conn_type='dst', pwd_env='DST_YBPASSWORD'))
 
     def additional_args_process(self):
-        if self.args_handler.args.create_dst_table:
-            self.src_to_dst_table_ddl(
-                self.args_handler.args.src_table, self.args_handler.args.dst_table
-                , self.src_conn, self.dst_conn
-                , self.args_handler)
-            print('-- created destination table: %s' % self.args_handler.args.dst_table)
+        args = self.args_handler.args
+        self.multi_table = (
+            self.db_filter_args.has_optional_args_multi_set('schema')
+            or self.db_filter_args.has_optional_args_multi_set('table'))
+        if self.stage_mode:
+            if not args.stage_dir:
+                self.args_handler.args_parser.error("the --stage_mode option requires --stage_dir")
+            if args.create_dst_table:
+                self.args_handler.args_parser.error("the --create_dst_table option can't be used with --stage_mode")
+            if Common.is_windows:
+                Common.error(Text.color("The '--stage_mode' option is not supported with powershell...", 'yellow'))
+        elif args.stage_dir:
+            self.args_handler.args_parser.error("the --stage_dir option is only used with --stage_mode")
+
+        if args.verify and self.stage_mode:
+            self.args_handler.args_parser.error("the --verify option needs both clusters and can't be used with --stage_mode")
+        if args.incremental_column and self.stage_mode == 'load':
+            self.args_handler.args_parser.error(
+                "the --incremental_column option is used with the --stage_mode unload of the data")
+        self.throughput_history_file = (args.throughput_history
+            or os.path.join(os.path.expanduser('~'), '.ybeasycli', 'copy_throughput_history.json'))
+        self.incremental_state_file = (args.incremental_state_file
+            or os.path.join(os.path.expanduser('~'), '.ybeasycli', 'incremental_state.json'))
+        if args.verify_recopy and not args.verify:
+            self.args_handler.args_parser.error("the --verify_recopy option requires --verify")
+
+        if args.resume or self.stage_mode == 'load':
+            if args.src_table or args.dst_table or self.multi_table or args.create_dst_table:
+                self.args_handler.args_parser.error(
+                    "the tables to copy are read from the %s manifest, the table arguments can't be set"
+                        % ('--resume' if args.resume else '--stage_dir'))
+        elif self.multi_table:
+            if args.src_table or args.dst_table:
+                self.args_handler.args_parser.error(
+                    "the --src_table and --dst_table options can't be used with the table filter arguments")
+        elif not (args.src_table and args.dst_table):
+            self.args_handler.args_parser.error(
+                "both --src_table and --dst_table must be set, or use the table filter arguments")
+        elif args.dst_schema:
+            self.args_handler.args_parser.error(
+                "the --dst_schema option is only used with the table filter arguments")
+
+        if (args.chunk_plan or args.save_chunk_plan) and (self.multi_table or args.resume or self.stage_mode == 'load'):
+            self.args_handler.args_parser.error(
+                "the chunk plan options are only used with the --src_table and --dst_table options")
+        if args.save_chunk_plan and not args.chunk_rows:
+            self.args_handler.args_parser.error("the --save_chunk_plan option requires --chunk_rows")
+        if args.chunk_plan and args.chunk_rows:
+            self.args_handler.args_parser.error("the --chunk_plan and --chunk_rows options can't be used together")
+
+        self.threads_auto = (args.threads == 'auto')
+        self.total_threads = args.auto_threads_max if self.threads_auto else args.threads
+
+        conns = [conn for conn in (self.src_conn, self.dst_conn) if conn]
 
         #thread use may have severe impact on the YB cluster, so I'm limiting it to super users
-        if (self.args_handler.args.threads > 1
-            and not self.src_conn.ybdb['is_super_user']
-            and not self.dst_conn.ybdb['is_super_user']):
+        if ((self.total_threads > 1
+                or (self.args_handler.args.pipelines or 1) > 1)
+            and not any(conn.ybdb['is_super_user'] for conn in conns)):
             Common.error(Text.color(
                 "The '--threads' option is only supported for YBDB super users."
                 , 'yellow'))
 
-        if (self.args_handler.args.chunk_rows
+        if (self.args_handler.args.chunk_rows and self.src_conn
             and self.src_conn.ybdb['version_major'] < 4):
             Common.error(Text.color(
                 "The '--chunk_rows' option is only supported on YBDB version 4 or higher."
                 " The source db is running YBDB %s..." % self.src_conn.ybdb['version']
                 , 'yellow'))
 
-        if Common.is_windows and self.src_conn.env['pwd'] != self.dst_conn.env['pwd']:
+        if (Common.is_windows and len(conns) == 2
+            and self.src_conn.env['pwd'] != self.dst_conn.env['pwd']):
             Common.error(Text.color(
                 "The source and destination password must be the same when running with powershell...") )
 
-        self.log_file_name_template = ('{}{}{}_{}_{{{{CofC}}}}{{{{TofT}}}}_{{log_type}}.log'.format(
+        self.log_file_name_prefix = '{}{}{}_{}_'.format(
             ('%s/' % self.args_handler.args.log_dir
                 if self.args_handler.args.log_dir
                 else '')
@@ -161,11 +570,78 @@ class yb_to_yb_copy_table(Util):
                 if self.args_handler.args.log_prefix
                 else '')
             , datetime.now().strftime("%Y%m%d_%H%M%S")
-            , "%04d" % random.randint(0,9999)))
+            , "%04d" % random.randint(0,9999))
 
-    def build_table_copy_cmd(self):
-        ybunload_env = "YBPASSWORD=$SRC_YBPASSWORD"
-        ybunload_cmd = ("ybunload"
+        self.stage_manifest_file = (os.path.join(args.stage_dir, 'manifest.json')
+            if self.stage_mode else None)
+        self.manifest_file = (args.resume or args.manifest
+            or (self.stage_manifest_file if self.stage_mode == 'unload' else None)
+            or '%smanifest.json' % self.log_file_name_prefix)
+
+    def get_copy_tables(self):
+        """Get the tables to copy, either the single --src_table or all the source
+        tables matching the table filters ordered by storage size, largest first.
+
+        :return: list of table dictionaries with the keys; src_table, dst_table,
+            label and log_file_name_template
+        """
+        if not self.multi_table:
+            return [self.copy_table(self.args_handler.args.src_table, self.args_handler.args.dst_table)]
+
+        sql_query = """
+SELECT
+    s.name AS schema_name
+    , t.name AS table_name
+    , NVL(SUM(ts.compressed_bytes), 0) AS compressed_bytes
+FROM
+    sys.table AS t
+    JOIN sys.schema AS s
+        ON t.schema_id = s.schema_id AND t.database_id = s.database_id
+    JOIN sys.database AS d
+        ON t.database_id = d.database_id
+    LEFT JOIN sys.table_storage AS ts
+        ON t.table_id = ts.table_id
+WHERE
+    d.name = CURRENT_DATABASE()
+    AND s.name NOT IN ('sys', 'pg_catalog', 'information_schema')
+    AND {filter_clause}
+GROUP BY 1, 2
+ORDER BY 3 DESC, 1, 2""".format(filter_clause = self.db_filter_sql())
+
+        cmd_result = self.src_conn.query_rows(sql_query)
+        cmd_result.on_error_exit()
+
+        tables = []
+        for (schema, table, compressed_bytes) in cmd_result.rows:
+            tables.append(self.copy_table(
+                '%s.%s' % (schema, table)
+                , '%s.%s' % (self.args_handler.args.dst_schema or schema, table)
+                , label='%s.%s ' % (schema, table)))
+
+        if not tables:
+            Common.error(Text.color('No source tables match the table filters...', 'yellow'))
+
+        return tables
+
+    def copy_table(self, src_table, dst_table, label='', where_clause=None, watermark=None, verify_base=None):
+        """
+        :param where_clause: the filter of the copied source rows, defaults to --unload_where_clause
+        :param watermark: the --incremental_column value saved once the table is copied
+        :param verify_base: the [rows, hash] of the destination rows matching the copy
+            before the copy started, see set_verify_base
+        """
+        table = {'src_table': src_table, 'dst_table': dst_table, 'label': label
+            , 'where_clause': (self.args_handler.args.where_clause if where_clause is None else where_clause)
+            , 'watermark': watermark, 'verify_base': verify_base}
+        # in multi-table mode the log file names include the source table
+        table['log_file_name_template'] = '{}{}{{{{CofC}}}}{{{{TofT}}}}_{{log_type}}.log'.format(
+            self.log_file_name_prefix
+            , (re.sub(r'[^\w.]', '_', label.strip()) + '_' if label else ''))
+        return table
+
+    def build_ybunload_cmd(self, table):
+        log_file_name_template = table['log_file_name_template']
+        return ("ybunload"
             " -h {src_host}"
             "{port_option}"
             " -U {src_user}"
@@ -181,9 +657,11 @@ class yb_to_yb_copy_table(Util):
             , src_user = self.src_conn.env['dbuser']
             , src_db = self.src_conn.database
             , delimiter = self.args_handler.args.delimiter
-            , log_file_name = (self.log_file_name_template.format(log_type='ybunload'))
+            , log_file_name = (log_file_name_template.format(log_type='ybunload'))
             , additionl_options = (' %s' % self.args_handler.args.ybunload_options if self.args_handler.args.ybunload_options else ''))
 
+    def build_ybload_cmd(self, table):
+        log_file_name_template = table['log_file_name_template']
         if (self.args_handler.args.ybload_options
             and re.search('logfile-log-level', self.args_handler.args.ybload_options, re.IGNORECASE)):
             #the user has set their own log level in ybload_options
@@ -192,11 +670,10 @@ class yb_to_yb_copy_table(Util):
             #set default log level 
             logfile_log_level_option = ' --logfile-log-level INFO'
 
-        dst_table = Common.quote_object_paths(self.args_handler.args.dst_table)
+        dst_table = Common.quote_object_paths(table['dst_table'])
         if Common.is_windows:
             dst_table = dst_table.replace('"','"\\""')
-        ybload_env = "YBPASSWORD=$DST_YBPASSWORD"
-        ybload_cmd = ("ybload"
+        return ("ybload"
             " -h {dst_host}"
             "{port_option}"
             " -U {dst_user}"
@@ -215,131 +692,881 @@ class yb_to_yb_copy_table(Util):
             , dst_db = self.dst_conn.database
             , dst_table = dst_table
             , delimiter = self.args_handler.args.delimiter
-            , log_file_name = (self.log_file_name_template.format(log_type='ybload'))
+            , log_file_name = (log_file_name_template.format(log_type='ybload'))
             , logfile_log_level_option = logfile_log_level_option
-            , bad_log_file_name = (self.log_file_name_template.format(log_type='ybload_bad'))
+            , bad_log_file_name = (log_file_name_template.format(log_type='ybload_bad'))
             , additionl_options = (' %s' % self.args_handler.args.ybload_options if self.args_handler.args.ybload_options else ''))
 
+    def build_table_copy_cmd(self, table):
+        ybunload_env = "YBPASSWORD=$SRC_YBPASSWORD"
+        ybload_env = "YBPASSWORD=$DST_YBPASSWORD"
+        if self.stage_mode == 'unload':
+            # the ybunload stdout is compressed to the shard file by write_shard
+            return "{ybunload_env} {ybunload_cmd}".format(
+                ybunload_env = ybunload_env
+                , ybunload_cmd = self.build_ybunload_cmd(table))
+        elif self.stage_mode == 'load':
+            return "gzip -dc '{{shard}}' | {ybload_env} {ybload_cmd}".format(
+                ybload_env = ybload_env
+                , ybload_cmd = self.build_ybload_cmd(table))
+
+        ybunload_cmd = self.build_ybunload_cmd(table)
+        ybload_cmd = self.build_ybload_cmd(table)
         if Common.is_windows:
             # powershell does not support command level environment variables
             # this limits yb_to_yb_copy to having the same user password for the src and dst cluster
-            self.table_copy_cmd = ("$env:YBPASSWORD=$env:SRC_YBPASSWORD; {ybunload_cmd}"
+            return ("$env:YBPASSWORD=$env:SRC_YBPASSWORD; {ybunload_cmd}"
                 " | {ybload_cmd}").format(
                 ybunload_cmd = ybunload_cmd
                 , ybload_cmd = ybload_cmd)
         else:
-            self.table_copy_cmd = ("{ybunload_env} {ybunload_cmd}"
+            return ("{ybunload_env} {ybunload_cmd}"
                 " | {ybload_env} {ybload_cmd}").format(
                 ybunload_env = ybunload_env
                 , ybunload_cmd = ybunload_cmd
                 , ybload_env = ybload_env
                 , ybload_cmd = ybload_cmd)
 
-    def chunk_table_unload_sql(self, table_unload_sql):
+    def chunk_table_unload_sql(self, table_unload_sql, src_table, where_clause):
         self.args_handler.args.dml = ("%s AND <chunk_where_clause>" % table_unload_sql)
         self.args_handler.args.execute_chunk_dml = False
         self.args_handler.args.verbose_chunk_off = False
         self.args_handler.args.null_chunk_off = False
         self.args_handler.args.print_chunk_dml = True
-        self.args_handler.args.table = Common.quote_object_paths(self.args_handler.args.src_table)
+        self.args_handler.args.table = Common.quote_object_paths(src_table)
         self.args_handler.args.column = 'rowunique'
         self.args_handler.args.column_cardinality = 'high'
-        if self.args_handler.args.where_clause:
-            self.args_handler.args.table_where_clause = self.args_handler.args.where_clause
+        if where_clause:
+            self.args_handler.args.table_where_clause = where_clause
         else:
             self.args_handler.args.table_where_clause = 'TRUE'
 
         cdml = chunk_dml_by_integer(db_conn=self.src_conn, args_handler=self.args_handler)
-        cdml.execute()
-        if cdml.cmd_results.exit_code:
-            cdml.cmd_results.write()
-            exit(cdml.cmd_results.exit_code)
+        if self.args_handler.args.chunk_plan:
+            chunks = cdml.read_chunk_plan()
+        else:
+            chunks = cdml.get_chunks()
+            if self.args_handler.args.save_chunk_plan:
+                cdml.write_chunk_plan(chunks)
 
-        return cdml.cmd_results.stdout.strip().split('\n')
+        return [cdml.chunk_dml(chunk) for chunk in chunks]
 
-    def execute(self):
-        src_table = Common.quote_object_paths(self.args_handler.args.src_table)
+    def table_chunks_sql(self, table):
+        src_table = Common.quote_object_paths(table['src_table'])
         if Common.is_windows:
             src_table = src_table.replace('"','"\\""')
         table_unload_sql = "SELECT * FROM {src_table} WHERE TRUE{where_clause}".format(
             src_table = src_table
-            , where_clause=(' AND %s' % self.args_handler.args.where_clause if self.args_handler.args.where_clause else ''))
+            , where_clause=(' AND %s' % table['where_clause'] if table['where_clause'] else ''))
 
-        if self.args_handler.args.chunk_rows:
-            chunks_sql = self.chunk_table_unload_sql(table_unload_sql)
-            if chunks_sql[0] == '':
-                chunks_sql[0] = 'SELECT * FROM %s WHERE FALSE /* dummy chunk when source table is empty */' % src_table
+        if self.args_handler.args.chunk_rows or self.args_handler.args.chunk_plan:
+            chunks_sql = self.chunk_table_unload_sql(table_unload_sql, table['src_table'], table['where_clause'])
+            if not chunks_sql:
+                chunks_sql = ['SELECT * FROM %s WHERE FALSE /* dummy chunk when source table is empty */' % src_table]
         else:
             chunks_sql = [table_unload_sql]
+            if self.args_handler.args.thread_partition == 'range' and self.total_threads > 1:
+                table['rowunique_range'] = self.rowunique_range(src_table, table['where_clause'])
+
+        return chunks_sql
+
+    def rowunique_range(self, src_table, where_clause):
+        """:return: the (low, high) rowunique range of the rows to copy, high is exclusive,
+            None for no rows
+        """
+        cmd_result = self.src_conn.ybsql_query('SELECT MIN(rowunique), MAX(rowunique) + 1 FROM %s%s' % (
+            src_table, (' WHERE %s' % where_clause if where_clause else '')))
+        cmd_result.on_error_exit()
+        (low, high) = cmd_result.stdout.strip().split('|')
+        return (int(low), int(high)) if low else None
+
+    def thread_clause(self, unload_sql, table, thread, total_threads):
+        """The predicate selecting the rows of a chunk copied by a thread.
+
+        :return: the predicate, None when the thread has no rows to copy
+        """
+        if self.args_handler.args.thread_partition == 'modulo':
+            return ' AND /* thread_clause(thread: %d) >>>*/ rowunique %% %d = %d /*<<< thread_clause */' % (thread, total_threads, thread-1)
 
-        os.environ['SRC_YBPASSWORD'] = self.src_conn.env['pwd']
-        os.environ['DST_YBPASSWORD'] = self.dst_conn.env['pwd']
+        # the chunk clause or the table's rowunique range bounds the sub-ranges
+        chunk_range = re.search(r'(-?\d+) <= rowunique AND rowunique < (-?\d+)', unload_sql)
+        if chunk_range:
+            (low, high) = (int(chunk_range.group(1)), int(chunk_range.group(2)))
+        elif table.get('rowunique_range'):
+            (low, high) = table['rowunique_range']
+        else:
+            # a chunk without a range, like the IS NULL chunk, is copied by the first thread
+            return '' if thread == 1 else None
+
+        (thread_low, thread_high) = (
+            low + (high - low) * (thread - 1) // total_threads
+            , low + (high - low) * thread // total_threads)
+        return ' AND /* thread_clause(thread: %d) >>>*/ %d <= rowunique AND rowunique < %d /*<<< thread_clause */' % (
+            thread, thread_low, thread_high)
+
+    def execute(self):
+        if self.args_handler.args.resume:
+            units = self.read_manifest(self.manifest_file)
+        elif self.stage_mode == 'load':
+            units = self.read_manifest(self.stage_manifest_file, stage_load=True)
+        else:
+            units = self.build_all_copy_units()
+
+        # the passwords are only passed in the environment of the copy cmds
+        copy_cmd_env = os.environ.copy()
+        if self.src_conn:
+            copy_cmd_env['SRC_YBPASSWORD'] = self.src_conn.env['pwd']
+        if self.dst_conn:
+            copy_cmd_env['DST_YBPASSWORD'] = self.dst_conn.env['pwd']
+
+        self.pool_size = self.args_handler.args.pipelines or self.total_threads
+        if self.args_handler.args.dry_run:
+            self.print_plan([unit for unit in units if unit['status'] != 'loaded'])
+            for unit in units:
+                if unit['status'] != 'loaded':
+                    print(self.copy_unit_cmd_str(unit))
+            exit(0)
+
+        if self.stage_mode == 'unload' and not os.path.isdir(self.args_handler.args.stage_dir):
+            os.makedirs(self.args_handler.args.stage_dir)
+        if self.args_handler.args.verify:
+            self.set_verify_base(units)
+        self.write_manifest(units)
+        self.adaptive_pool = AdaptivePool(self.pool_size) if self.threads_auto else None
+        self.progress = CopyProgress(units, self.pool_size, self.unit_log_file_name
+            , self.args_handler.args.progress)
+        self.progress.start()
+        exit_code = self.run_copy_units(units, copy_cmd_env)
+        if not exit_code and self.args_handler.args.verify:
+            exit_code = self.verify_and_recopy(units, copy_cmd_env)
+        self.progress.stop()
+        if self.args_handler.args.stats_file:
+            self.progress.write_stats(self.args_handler.args.stats_file)
+        if exit_code:
+            print('-- the copy can be resumed with: --resume %s' % self.manifest_file)
+        else:
+            self.save_watermarks(units)
+            self.record_throughput(units)
+
+        exit(exit_code)
+
+    def table_storage(self, table):
+        """:return: the rows, compressed and uncompressed bytes of the source table
+            from sys.table_storage
+        """
+        (database, schema, table_name) = Common.split_db_object_name(table['src_table'].replace('"', ''))
+        cmd_result = self.src_conn.query_rows("""SELECT
+    NVL(SUM(ts.rows_columnstore), 0) AS rows
+    , NVL(SUM(ts.compressed_bytes), 0) AS cmpr_bytes
+    , NVL(SUM(ts.uncompressed_bytes), 0) AS uncmpr_bytes
+FROM
+    sys.table AS t
+    JOIN sys.schema AS s
+        ON t.schema_id = s.schema_id AND t.database_id = s.database_id
+    JOIN sys.database AS d
+        ON t.database_id = d.database_id
+    LEFT JOIN sys.table_storage AS ts
+        ON t.table_id = ts.table_id
+WHERE
+    d.name = CURRENT_DATABASE()
+    AND s.name = %s
+    AND t.name = '%s'""" % (("'%s'" % schema) if schema else 'CURRENT_SCHEMA', table_name))
+        cmd_result.on_error_exit()
 
+        return [int(value) for value in cmd_result.rows[0]] if cmd_result.rows else [0, 0, 0]
+
+    def print_plan(self, units):
+        """Print the estimated rows and bytes of each table chunk, from the source table
+        storage and the chunk sizes, and the projected copy duration.
+        """
+        plan = collections.OrderedDict()
+        storage = {}
+        for unit in units:
+            table = unit['table']
+            if id(table) not in storage:
+                storage[id(table)] = self.table_storage(table) if self.src_conn else None
+            plan.setdefault((id(table), unit['chunk']), []).append(unit)
+
+        data = []
+        total_rows = 0
+        for chunk_units in plan.values():
+            table = chunk_units[0]['table']
+            table_storage = storage[id(table)]
+            table_units = len([unit for unit in units if unit['table'] is table])
+            rows = 0
+            for unit in chunk_units:
+                if unit.get('expected_rows') is not None:
+                    rows += unit['expected_rows']
+                elif table_storage:
+                    # without chunk sizes the table rows are spread evenly over its units
+                    rows += table_storage[0] // table_units
+            total_rows += rows
+            (table_rows, cmpr_bytes, uncmpr_bytes) = table_storage or (0, 0, 0)
+            data.append([
+                table['src_table'], chunk_units[0]['CofC'], len(chunk_units), rows
+                , CopyProgress.format_bytes(cmpr_bytes * rows // table_rows if table_rows else 0)
+                , CopyProgress.format_bytes(uncmpr_bytes * rows // table_rows if table_rows else 0)])
+
+        rows_per_second = self.projected_rows_per_second(min(self.pool_size, len(units)))
+        plan_str = tabulate(data, headers=['table', 'chunk', 'threads', 'est rows', 'est cmpr', 'est uncmpr'])
+        print('\n'.join('-- %s' % line for line in plan_str.split('\n')))
+        print('-- total: %d units, %s est rows, projected duration with %d pipelines: %s' % (
+            len(units), format(total_rows, ','), self.pool_size
+            , (CopyProgress.format_duration(total_rows / rows_per_second)
+                if rows_per_second
+                else 'unknown, there is no throughput history in %s' % self.throughput_history_file)))
+
+    def read_throughput_history(self):
+        try:
+            with open(self.throughput_history_file, 'r') as history_file:
+                return json.load(history_file)
+        except (IOError, OSError, ValueError):
+            return []
+
+    def projected_rows_per_second(self, pipelines):
+        """Project the rows/s of a copy from the per pipeline rows/s of the past copies
+        between the same hosts, or of all the past copies if there are none.
+        """
+        history = self.read_throughput_history()
+        hosts = (self.manifest_conn(self.src_conn), self.manifest_conn(self.dst_conn))
+        same_hosts = [record for record in history if (record['src'], record['dst']) == hosts]
+        records = (same_hosts or history)[-10:]
+        if not records:
+            return None
+        pipeline_rows_per_second = sum(
+            record['rows_per_second'] / record['pipelines'] for record in records) / len(records)
+        return pipeline_rows_per_second * pipelines
+
+    def record_throughput(self, units):
+        """Add the rows/s of a completed copy to the --throughput_history file, the
+        last 100 copies are kept.
+        """
+        copied_units = [unit for unit in units if unit.get('start_time')]
+        rows = sum((unit.get('rows') or 0) for unit in copied_units)
+        seconds = (datetime.now() - self.progress.start_time).total_seconds()
+        if not rows or not seconds:
+            return
+
+        history = self.read_throughput_history()
+        history.append({
+            'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'src': self.manifest_conn(self.src_conn)
+            , 'dst': self.manifest_conn(self.dst_conn)
+            , 'stage_mode': self.stage_mode
+            , 'units': len(copied_units)
+            , 'pipelines': max(1, min(self.pool_size, len(copied_units)))
+            , 'rows': rows
+            , 'seconds': round(seconds, 3)
+            , 'rows_per_second': round(rows / seconds, 1) })
+        try:
+            history_dir = os.path.dirname(self.throughput_history_file)
+            if history_dir and not os.path.isdir(history_dir):
+                os.makedirs(history_dir, 0o700)
+            tmp_file_name = '%s.tmp' % self.throughput_history_file
+            with open(tmp_file_name, 'w') as history_file:
+                json.dump(history[-100:], history_file, indent=4)
+            getattr(os, 'replace', os.rename)(tmp_file_name, self.throughput_history_file)
+        except (IOError, OSError) as error:
+            # the history only improves the --dry_run plan, the copy itself succeeded
+            Common.error('throughput history not saved: %s' % error, exit_code=None, color='yellow')
+
+    def build_all_copy_units(self):
+        # the units of all the tables share 1 pool of pipelines, the tables are
+        #   ordered largest first so the long running copies are started first
+        units = []
+        for table in self.get_copy_tables():
+            if self.args_handler.args.create_dst_table:
+                self.src_to_dst_table_ddl(
+                    table['src_table'], table['dst_table']
+                    , self.src_conn, self.dst_conn
+                    , self.args_handler)
+                print('-- created destination table: %s' % table['dst_table'])
+
+            if self.args_handler.args.incremental_column:
+                self.set_incremental_where_clause(table)
+            table['copy_cmd'] = self.build_table_copy_cmd(table)
+            units.extend(self.build_copy_units(table, self.table_chunks_sql(table)))
+
+        return units
+
+    def incremental_state_key(self, table):
+        return '%s %s %s' % (
+            '/'.join([self.src_conn.env['host'], self.src_conn.database, table['src_table']])
+            , ('/'.join([self.dst_conn.env['host'], self.dst_conn.database, table['dst_table']])
+                if self.dst_conn else 'stage/%s' % table['dst_table'])
+            , self.args_handler.args.incremental_column)
+
+    def read_incremental_state(self):
+        try:
+            with open(self.incremental_state_file, 'r') as state_file:
+                return json.load(state_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def max_value(self, db_conn, table, column):
+        """:return: the MAX(column) of the table as a string, None for an empty table"""
+        cmd_result = db_conn.ybsql_query('SELECT MAX(%s) IS NULL, MAX(%s) FROM %s' % (
+            column, column, Common.quote_object_paths(table)))
+        cmd_result.on_error_exit()
+        (is_null, value) = cmd_result.stdout.rstrip('\r\n').split('|', 1)
+        return None if is_null == 't' else value
+
+    def set_incremental_where_clause(self, table):
+        """Limit the copy of the table to the rows after the destination high water mark
+        and up to the source MAX(--incremental_column) when the copy starts, rows added
+        to the source during the copy are left for the next copy.
+        """
+        column = Common.quote_object_paths(self.args_handler.args.incremental_column)
+        low = self.max_value(self.dst_conn, table['dst_table'], column) if self.dst_conn else None
+        if low is None:
+            low = self.read_incremental_state().get(self.incremental_state_key(table))
+        high = self.max_value(self.src_conn, table['src_table'], column)
+
+        quote = lambda value: "'%s'" % value.replace("'", "''")
+        if high is None:
+            incremental_clause = 'FALSE'
+        elif low is None:
+            incremental_clause = '%s <= %s' % (column, quote(high))
+        else:
+            incremental_clause = '%s > %s AND %s <= %s' % (column, quote(low), column, quote(high))
+        print('-- incremental copy of %s: %s' % (table['src_table'], incremental_clause))
+
+        table['where_clause'] = ('(%s) AND %s' % (table['where_clause'], incremental_clause)
+            if table['where_clause'] else incremental_clause)
+        table['watermark'] = high
+
+    def save_watermarks(self, units):
+        if not self.src_conn:
+            # the watermarks of a staged copy are saved by its --stage_mode unload
+            return
+
+        watermarks = {}
+        for unit in units:
+            if unit['table'].get('watermark') is not None:
+                watermarks[self.incremental_state_key(unit['table'])] = unit['table']['watermark']
+        if not watermarks:
+            return
+
+        state = self.read_incremental_state()
+        state.update(watermarks)
+        state_dir = os.path.dirname(self.incremental_state_file)
+        if state_dir and not os.path.isdir(state_dir):
+            os.makedirs(state_dir, 0o700)
+        tmp_file_name = '%s.%d.tmp' % (self.incremental_state_file, os.getpid())
+        with open(tmp_file_name, 'w') as state_file:
+            json.dump(state, state_file, indent=4, sort_keys=True)
+        getattr(os, 'replace', os.rename)(tmp_file_name, self.incremental_state_file)
+
+    def manifest_conn(self, conn):
+        return {'host': conn.env['host'], 'database': conn.database} if conn else None
+
+    def write_manifest(self, units):
+        """Write the chunks and the state of each unit to the manifest file, the
+        manifest is rewritten as each unit completes so a failed copy can be resumed.
+        """
+        tables = []
+        for unit in units:
+            if unit['table'] not in tables:
+                tables.append(unit['table'])
+
+        manifest = {
+            'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'src': self.manifest_conn(self.src_conn)
+            , 'dst': self.manifest_conn(self.dst_conn)
+            , 'delimiter': self.args_handler.args.delimiter
+            , 'stage_mode': self.stage_mode
+            , 'tables': [
+                dict((key, table[key]) for key in ('src_table', 'dst_table', 'label', 'where_clause', 'watermark', 'verify_base'))
+                for table in tables]
+            , 'units': [] }
+        for unit in units:
+            manifest_unit = dict((key, unit.get(key)) for key in (
+                'chunk', 'thread', 'CofC', 'TofT', 'unload_sql', 'expected_rows', 'status', 'exit_code', 'rows'
+                , 'shard', 'shard_rows', 'shard_bytes', 'sha256'))
+            manifest_unit['table'] = tables.index(unit['table'])
+            manifest['units'].append(manifest_unit)
+
+        tmp_file_name = '%s.%d.tmp' % (self.manifest_file, os.getpid())
+        with open(tmp_file_name, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+        getattr(os, 'replace', os.rename)(tmp_file_name, self.manifest_file)
+
+    def read_manifest(self, manifest_file_name, stage_load=False):
+        """Read the units of a previous copy from the --resume manifest, units that
+        were not loaded are reset to pending.
+
+        :param manifest_file_name: the manifest file to read
+        :param stage_load: the manifest is the --stage_mode unload manifest, all its
+            shards must be written and all its units are reset to pending
+        """
+        try:
+            with open(manifest_file_name, 'r') as manifest_file:
+                manifest = json.load(manifest_file)
+        except (IOError, OSError, ValueError) as error:
+            Common.error('invalid manifest file: %s' % error)
+
+        if manifest.get('stage_mode') != ('unload' if stage_load else self.stage_mode):
+            Common.error(Text.color(
+                "The manifest %s was not created by a %s..." % (manifest_file_name
+                    , ('--stage_mode unload' if stage_load else 'copy with the same --stage_mode'))
+                , 'yellow'))
+        # the data was unloaded with the delimiter of the manifest
+        self.args_handler.args.delimiter = manifest['delimiter']
+
+        if stage_load:
+            if any(unit['status'] != 'loaded' for unit in manifest['units']):
+                Common.error(Text.color(
+                    "The staged unload is incomplete, complete it with: --stage_mode unload --resume %s"
+                        % manifest_file_name
+                    , 'yellow'))
+            for unit in manifest['units']:
+                unit['status'] = 'pending'
+                unit['expected_rows'] = unit['shard_rows']
+                # the stage directory may have been moved or copied to another host
+                unit['shard'] = os.path.join(self.args_handler.args.stage_dir, os.path.basename(unit['shard']))
+                unit['rows'] = None
+
+        for (conn_type, conn) in (('src', self.src_conn), ('dst', self.dst_conn)):
+            if stage_load:
+                break
+            if manifest[conn_type] != self.manifest_conn(conn):
+                Common.error(Text.color(
+                    "The --resume manifest was created for the %s: %s, not: %s..."
+                        % (conn_type, manifest[conn_type], self.manifest_conn(conn))
+                    , 'yellow'))
+
+        tables = []
+        for manifest_table in manifest['tables']:
+            table = self.copy_table(
+                manifest_table['src_table'], manifest_table['dst_table'], manifest_table['label']
+                , manifest_table.get('where_clause'), manifest_table.get('watermark')
+                , manifest_table.get('verify_base'))
+            table['copy_cmd'] = self.build_table_copy_cmd(table)
+            tables.append(table)
+
+        units = []
+        for manifest_unit in manifest['units']:
+            unit = dict(manifest_unit)
+            unit['table'] = tables[manifest_unit['table']]
+            if unit['status'] != 'loaded':
+                # a failed ybload rolls back, so the unit is copied again from the start
+                unit['status'] = 'pending'
+                unit['exit_code'] = None
+            units.append(unit)
+
+        return units
+
+    def build_copy_units(self, table, chunks_sql):
+        """Split the copy of a table into units of work, 1 unit per chunk and thread,
+        each unit is copied by its own ybunload|ybload pipeline.
+        """
         total_chunks = len(chunks_sql)
         format_CofC = 'chunk%.0{len}dof%.0{len}d'.format(len=len(str(total_chunks)))
-        total_threads = self.args_handler.args.threads
-        is_dry_run = self.args_handler.args.dry_run
+        total_threads = self.total_threads
         format_TofT = '_thread%.0{len}dof%.0{len}d'.format(len=len(str(total_threads)))
         TofT = ''
         thread_clause = ''
+        units = []
         for chunk in range(1,total_chunks+1):
             unload_sql = chunks_sql[chunk-1]
             CofC = format_CofC % (chunk, total_chunks)
 
-            cmd_threads = []
+            chunk_size = re.search(r'chunk_clause\(chunk: \d+, size: (\d+)\)', unload_sql)
             for thread in range(1,total_threads+1):
                 if total_threads > 1:
-                    thread_clause = ' AND /* thread_clause(thread: %d) >>>*/ rowunique %% %d = %d /*<<< thread_clause */' % (thread, total_threads, thread-1)
+                    thread_clause = self.thread_clause(unload_sql, table, thread, total_threads)
+                    if thread_clause is None:
+                        continue
                     TofT = format_TofT % (thread, total_threads)
-                copy_cmd = self.table_copy_cmd.format(
-                    unload_sql=unload_sql.rstrip().rstrip(';') + thread_clause
-                    , CofC=CofC
-                    , TofT=TofT)
-                if is_dry_run:
-                    print(copy_cmd)
+                units.append({
+                    'table': table
+                    , 'chunk': chunk
+                    , 'thread': thread
+                    , 'CofC': CofC
+                    , 'TofT': TofT
+                    , 'unload_sql': unload_sql.rstrip().rstrip(';') + thread_clause
+                    , 'expected_rows': (int(chunk_size.group(1)) // total_threads if chunk_size else None)
+                    , 'shard': (os.path.join(self.args_handler.args.stage_dir, '%s_%s%s.gz' % (
+                        re.sub(r'[^\w.]', '_', table['src_table']), CofC, TofT))
+                        if self.stage_mode else None)
+                    , 'status': 'pending'
+                    , 'exit_code': None })
+
+        return units
+
+    # the per row hash of --verify, summed so the result doesn't depend on the row order
+    verify_hash_sql = 'SUM(HASH8({row_text}))'
+
+    def set_verify_base(self, units):
+        """Count and hash the destination rows matching the copy of each table before
+        the copy starts, --verify compares the source with the destination rows added
+        by the copy.  A --resume keeps the base of its first run, the rows loaded by
+        that run are part of the copy.
+        """
+        tables = []
+        for unit in units:
+            if unit['table'] not in tables:
+                tables.append(unit['table'])
+
+        base_tables = [table for table in tables if table['verify_base'] is None]
+        if base_tables and self.args_handler.args.resume:
+            Common.error(Text.color(
+                "The '--verify' option of a --resume requires the manifest of a copy run with --verify..."
+                , 'yellow'))
+        queries = [(self.dst_conn, self.verify_table_sql(table).replace('<table>'
+            , Common.quote_object_paths(table['dst_table']))) for table in base_tables]
+        for (table, result) in zip(base_tables, self.run_verify_queries(queries)):
+            result.on_error_exit()
+            table['verify_base'] = self.verify_rows_hash(result)
+
+        if self.args_handler.args.verify_recopy:
+            for table in tables:
+                if table['verify_base'][0]:
+                    # the recopy DELETE can't tell the rows of the copy from these rows
+                    Common.error(Text.color(
+                        "The '--verify_recopy' option requires a destination without rows matching the copy,"
+                        " %s has %d rows..." % (table['dst_table'], table['verify_base'][0])
+                        , 'yellow'))
+
+    @staticmethod
+    def verify_rows_hash(result):
+        """:return: the [rows, hash] of a verify_table_sql result, the hash of no rows is 0"""
+        (rows, row_hash) = result.stdout.strip().split('|')
+        return [int(rows), int(row_hash) if row_hash else 0]
+
+    def verify_and_recopy(self, units, copy_cmd_env):
+        """Verify the copy, with --verify_recopy the tables that differ are copied again
+        and verified once more.
+
+        :return: 0 if the source and destination match, otherwise 1
+        """
+        differ_tables = self.verify_copy(units)
+        if differ_tables and self.args_handler.args.verify_recopy:
+            recopy_units = [unit for unit in units if unit['table'] in differ_tables]
+            for table in differ_tables:
+                # set_verify_base checked the destination had no rows matching the copy
+                dst_table = Common.quote_object_paths(table['dst_table'])
+                self.dst_conn.ybsql_query('DELETE FROM %s%s' % (dst_table
+                    , (' WHERE %s' % table['where_clause']
+                        if table['where_clause'] else ''))).on_error_exit()
+                print('-- verify: deleted the copied rows of %s, copying the table again' % table['dst_table'])
+            for unit in recopy_units:
+                unit['status'] = 'pending'
+                unit['rows'] = None
+            exit_code = self.run_copy_units(units, copy_cmd_env)
+            if exit_code:
+                return exit_code
+            differ_tables = self.verify_copy(recopy_units)
+
+        return 1 if differ_tables else 0
+
+    def verify_copy(self, units):
+        """Compare the source and destination of the copied units.
+
+        The chunk/thread predicates are ranges of the source rowunique, which has
+        other values in the destination.  So each unit's source COUNT(*) is compared
+        with the rows ybload loaded for the unit.  Then the COUNT(*) and the summed
+        row hash of each source table is compared with the destination COUNT(*) and
+        summed row hash less the verify_base of the rows that were in the destination
+        before the copy, the sums only differ by the rows the copy added.
+
+        :return: the list of tables that differ
+        """
+        tables = []
+        for unit in units:
+            if unit['table'] not in tables:
+                tables.append(unit['table'])
+
+        queries = [(self.src_conn, 'SELECT COUNT(*) FROM (%s) AS unit' % unit['unload_sql'])
+            for unit in units]
+        for table in tables:
+            table_sql = self.verify_table_sql(table)
+            queries.append((self.src_conn, table_sql.replace('<table>', Common.quote_object_paths(table['src_table']))))
+            queries.append((self.dst_conn, table_sql.replace('<table>', Common.quote_object_paths(table['dst_table']))))
+        results = self.run_verify_queries(queries)
+
+        differ_tables = []
+        for (unit, result) in zip(units, results):
+            result.on_error_exit()
+            # a unit without a reported row count is only checked by the table checks
+            if unit.get('rows') is not None and int(result.stdout.strip()) != unit['rows']:
+                print('-- verify %s%s%s: source rows: %s, loaded rows: %s' % (
+                    unit['table']['label'], unit['CofC'], unit['TofT']
+                    , result.stdout.strip(), unit.get('rows')))
+                if unit['table'] not in differ_tables:
+                    differ_tables.append(unit['table'])
+
+        table_results = results[len(units):]
+        for (i, table) in enumerate(tables):
+            (src_result, dst_result) = table_results[i * 2:i * 2 + 2]
+            src_result.on_error_exit()
+            dst_result.on_error_exit()
+            src_rows_hash = self.verify_rows_hash(src_result)
+            dst_rows_hash = [value - base for (value, base)
+                in zip(self.verify_rows_hash(dst_result), table['verify_base'])]
+            if src_rows_hash != dst_rows_hash:
+                print('-- verify %s: source rows|hash: %d|%d, destination %s copied rows|hash: %d|%d' % (
+                    tuple([table['src_table']] + src_rows_hash + [table['dst_table']] + dst_rows_hash)))
+                if table not in differ_tables:
+                    differ_tables.append(table)
+
+        print('-- verify: %d chunk/thread units and %d tables checked, %s' % (
+            len(units), len(tables)
+            , (Text.color('%d tables differ' % len(differ_tables), 'red')
+                if differ_tables else 'no differences')))
+
+        return differ_tables
+
+    def verify_table_sql(self, table):
+        """The row count and summed row hash SQL of a table, with a <table> placeholder
+        for the source or destination table.
+        """
+        (database, schema, table_name) = Common.split_db_object_name(table['src_table'].replace('"', ''))
+        cmd_result = self.src_conn.query_rows("""SELECT column_name
+FROM information_schema.columns
+WHERE table_schema = %s AND table_name = '%s'
+ORDER BY ordinal_position""" % (("'%s'" % schema) if schema else 'CURRENT_SCHEMA', table_name))
+        cmd_result.on_error_exit()
+
+        row_text = " || CHR(31) || ".join(
+            "NVL(%s::VARCHAR, '<NULL>')" % Common.quote_object_paths(row[0])
+            for row in cmd_result.rows)
+        return 'SELECT COUNT(*), {hash} FROM <table>{where_clause}'.format(
+            hash = self.verify_hash_sql.format(row_text=row_text or "''")
+            , where_clause = (' WHERE %s' % table['where_clause']
+                if table['where_clause'] else ''))
+
+    def run_verify_queries(self, queries):
+        """Run the (db_conn, sql) queries with --verify_concurrency threads, the source
+        and destination queries run at the same time.
+
+        :return: list of the query results in the order of the queries
+        """
+        results = [None] * len(queries)
+        pending = queue.Queue()
+        for (i, (db_conn, sql)) in enumerate(queries):
+            pending.put((i, db_conn, sql))
+
+        def run_queries():
+            # a DBConnect, its ybsql session and query tag counter, is not thread safe
+            # so every worker runs the queries on its own copy of each connection
+            worker_conns = {}
+            while True:
+                try:
+                    (i, db_conn, sql) = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if id(db_conn) not in worker_conns:
+                    worker_conns[id(db_conn)] = copy.deepcopy(db_conn)
+                results[i] = worker_conns[id(db_conn)].ybsql_query(sql)
+            for worker_conn in worker_conns.values():
+                worker_conn.ybsql_session_close()
+
+        workers = [threading.Thread(target=run_queries)
+            for worker in range(min(self.args_handler.args.verify_concurrency, len(queries)))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return results
+
+    def unit_log_file_name(self, unit, log_type):
+        return unit['table']['log_file_name_template'].format(
+            log_type=log_type).format(
+                CofC=unit['CofC']
+                , TofT=unit['TofT'])
+
+    def copy_unit_cmd_str(self, unit):
+        return unit['table']['copy_cmd'].format(
+            shard=unit.get('shard')
+            , unload_sql=unit['unload_sql']
+            , CofC=unit['CofC']
+            , TofT=unit['TofT'])
+
+    def run_copy_units(self, units, copy_cmd_env):
+        """Copy the units with a pool of pipelines, a new unit is started as soon as
+        a running pipeline completes, so a slow unit doesn't hold up the others.
+        After a failed unit no new units are started and the running units are
+        completed.  With --threads auto the pool size is adjusted as units complete
+        and a failed unit is retried once with a smaller pool.
+
+        :param units: list of copy units, see build_copy_units, each unit's status
+            is set to; pending, running, loaded or failed, loaded units are skipped
+        :param copy_cmd_env: the environment of the copy cmds
+        :return: 0 if all units are loaded, otherwise the exit code of a failed unit
+        """
+        pending = collections.deque(unit for unit in units if unit['status'] != 'loaded')
+        completed = queue.Queue()
+        self.copy_unit_waiters = []
+        running = 0
+        exit_code = 0
+        while (pending and not exit_code) or running:
+            pool_size = self.adaptive_pool.size if self.adaptive_pool else self.pool_size
+            while pending and not exit_code and running < pool_size:
+                self.start_copy_unit(pending.popleft(), copy_cmd_env, completed)
+                running += 1
+
+            unit = self.next_completed_unit(completed)
+            running -= 1
+            if self.copy_unit_completed(unit):
+                if self.adaptive_pool:
+                    self.adaptive_pool.unit_loaded(unit.get('rows'))
+            elif self.adaptive_pool and unit['attempts'] < 2:
+                self.adaptive_pool.unit_failed()
+                unit['status'] = 'pending'
+                pending.appendleft(unit)
+            else:
+                exit_code = unit['exit_code'] or 1
+            self.write_manifest(units)
+
+        return exit_code
+
+    def next_completed_unit(self, completed):
+        """Wait for the next completed unit, every unit thread posts its unit when it
+        ends, a thread that ended without posting it would otherwise block the copy.
+        """
+        while True:
+            try:
+                return completed.get(timeout=1)
+            except queue.Empty:
+                self.copy_unit_waiters = [waiter for waiter in self.copy_unit_waiters if waiter.is_alive()]
+                # a unit is posted before its thread ends, so check the queue once more
+                if not self.copy_unit_waiters and completed.empty():
+                    Common.error('the copy unit threads ended without reporting their units')
+
+    def start_copy_unit(self, unit, copy_cmd_env, completed):
+        unit['status'] = 'running'
+        unit['attempts'] = unit.get('attempts', 0) + 1
+        unit['start_time'] = datetime.now()
+
+        def copy_unit():
+            try:
+                shard_error = self.stage_mode == 'load' and self.shard_error(unit)
+                if shard_error:
+                    unit['cmd'] = CmdResult(stderr=shard_error, exit_code=1)
+                elif self.stage_mode == 'unload':
+                    unit['cmd'] = Cmd(self.copy_unit_cmd_str(unit), False, stream=True, env=copy_cmd_env)
+                    try:
+                        self.write_shard(unit)
+                    except (IOError, OSError) as error:
+                        unit['cmd'].p.kill()
+                        unit['cmd'] = CmdResult(stderr='shard %s not written: %s' % (unit['shard'], error), exit_code=1)
                 else:
-                    cmd = Cmd(copy_cmd, False, wait=False)
-                    cmd.TofT = TofT
-                    cmd_threads.append(cmd)
+                    unit['cmd'] = Cmd(self.copy_unit_cmd_str(unit), False, env=copy_cmd_env)
+            except Exception as error:
+                # any error fails the unit, the unit is always posted to completed
+                process = getattr(unit.get('cmd'), 'p', None)
+                if process and process.poll() is None:
+                    process.kill()
+                unit['cmd'] = CmdResult(stderr='copy unit failed: %s' % error, exit_code=1)
+            finally:
+                completed.put(unit)
+
+        waiter = threading.Thread(target=copy_unit)
+        waiter.daemon = True
+        self.copy_unit_waiters.append(waiter)
+        waiter.start()
 
-            thread_exit_code = 0
-            thread_failed = False
-            for cmd in cmd_threads:
-                cmd.wait()
+    def write_shard(self, unit):
+        """Compress the ybunload stdout of a staged unload unit to its shard file and
+        record the rows, compressed bytes and sha256 of the shard.
+        """
+        with open(unit['shard'], 'wb') as shard_file:
+            # the shard name is not stored in the gzip header, so equal data gives equal shards
+            with gzip.GzipFile(filename='', mode='wb', fileobj=shard_file, mtime=0) as gzip_file:
+                for chunk in unit['cmd'].iter_chunks():
+                    gzip_file.write(chunk)
+        (unit['shard_bytes'], unit['sha256']) = self.shard_checksum(unit['shard'])
+        # counting the new lines of the shard would also count the new lines quoted in text values
+        unit['shard_rows'] = self.unload_log_rows(unit)
+        unit['rows'] = unit['shard_rows']
+
+    def unload_log_rows(self, unit):
+        """:return: the rows ybunload reported in the last row count of its log, None when
+            the log has no row count, then the rows of the shard are not checked on load
+        """
+        rows = None
+        try:
+            with open(self.unit_log_file_name(unit, 'ybunload'), 'r') as log_file:
+                for line in log_file:
+                    match = CopyProgress.rows_regex.search(line)
+                    if match:
+                        rows = int(match.group(1).replace(',', ''))
+        except (IOError, OSError):
+            return None
+        return rows
 
+    @staticmethod
+    def shard_checksum(shard_file_name):
+        sha256 = hashlib.sha256()
+        shard_bytes = 0
+        with open(shard_file_name, 'rb') as shard_file:
+            for block in iter(lambda: shard_file.read(1048576), b''):
+                sha256.update(block)
+                shard_bytes += len(block)
+        return (shard_bytes, sha256.hexdigest())
+
+    def shard_error(self, unit):
+        """Check a shard against its manifest entry before it is loaded.
+
+        :return: an error message or None if the shard is valid
+        """
+        try:
+            (shard_bytes, sha256) = self.shard_checksum(unit['shard'])
+        except (IOError, OSError) as error:
+            return 'missing shard: %s' % error
+        if sha256 != unit['sha256']:
+            return 'shard %s failed its sha256 check, expected: %s, found: %s' % (
+                unit['shard'], unit['sha256'], sha256)
+        return None
+
+    def copy_unit_completed(self, unit):
+        """Check the ybload log of a completed unit and report the unit result, a
+        staged unload unit is complete when its shard is written.
+
+        :return: True if the unit was loaded
+        """
+        cmd = unit.pop('cmd')
+        unit['exit_code'] = cmd.exit_code
+        unit['end_time'] = datetime.now()
+        self.progress.unit_completed(unit)
+
+        loaded = False
+        print('-- %s%s%s'
+            % (unit['table']['label'], unit['CofC'], unit['TofT']))
+        if cmd.exit_code == 0 and self.stage_mode == 'unload':
+            loaded = True
+            print('-- unloaded %s rows to: %s' % (
+                ('an unknown number of' if unit['shard_rows'] is None else unit['shard_rows'])
+                , unit['shard']))
+        elif cmd.exit_code == 0:
+            ybload_log_file_name = self.unit_log_file_name(unit, 'ybload')
+            file = open(ybload_log_file_name, "r")
+            for line in file:
+                if re.search('SUCCESSFUL BULK LOAD', line):
+                    loaded = True
+                    rows = re.search(r'Loaded (\d+) good rows', line)
+                    unit['rows'] = int(rows.group(1)) if rows else None
+                    sys.stdout.write(line)
+                    break
+            file.close()
+
+            if loaded and unit.get('shard_rows') not in (None, unit['rows']):
                 loaded = False
-                print('-- %s%s'
-                    % (CofC, cmd.TofT))
-                if cmd.exit_code == 0:
-                    ybload_log_file_name = self.log_file_name_template.format(
-                        log_type='ybload').format(
-                            CofC=CofC
-                            , TofT=cmd.TofT)
-                    file = open(ybload_log_file_name, "r")
-                    for line in file:
-                        if re.search('SUCCESSFUL BULK LOAD', line):
-                            loaded = True
-                            sys.stdout.write(line)
-                            break
-
-                if not loaded:
-                    cmd.write()
-                    log_file_name = self.log_file_name_template.format(
-                        log_type='*').format(
-                            CofC=CofC
-                            , TofT=cmd.TofT)
-                    print('Table Copy {}, please review the log files: {}'.format(
-                        Text.color('Failed', 'red'), log_file_name))
-                    thread_exit_code = cmd.exit_code
-                    thread_failed = True
-
-            if thread_failed:
-                exit(thread_exit_code)
-
-        del os.environ['SRC_YBPASSWORD']
-        del os.environ['DST_YBPASSWORD']
-
-        exit(0)
+                cmd.stderr = 'loaded %s rows from shard %s, the manifest has %d rows' % (
+                    unit['rows'], unit['shard'], unit['shard_rows'])
+
+        if not loaded:
+            cmd.write()
+            log_file_name = self.unit_log_file_name(unit, '*')
+            print('Table Copy {}, please review the log files: {}'.format(
+                Text.color('Failed', 'red'), log_file_name))
+
+        unit['status'] = 'loaded' if loaded else 'failed'
+
+        return loaded
 
 def main():
     ytoy = yb_to_yb_copy_table(init_default=False)
@@ -349,8 +1576,6 @@ def main():
 
     ytoy.additional_args_process()
 
-    ytoy.build_table_copy_cmd()
-
     ytoy.execute()
 
 